@@ -1,3 +1,11 @@
 from .base_simulation_object import BaseSimObject
-from .runtime import NoObjectsToStep, NoTimestampProgression, SimulationRuntime
+from .event import Event
+from .profile import ObjectProfile, RuntimeProfile
+from .runtime import (
+    DEFAULT_SEED,
+    NoObjectsToStep,
+    NoTimestampProgression,
+    SimulationRuntime,
+)
+from .stopping_rule import DEFAULT_BATCH_SECONDS, BatchMeansStoppingRule
 from .visualizer import Visualizer
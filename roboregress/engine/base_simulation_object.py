@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
 from collections.abc import Generator
+from typing import Any
 
 import open3d as o3d
 
-LoopGenerator = Generator[float | None, None, None]
+from .event import Event
+
+LoopGenerator = Generator[float | Event | None, None, None]
 
 
 class BaseSimObject(ABC):
@@ -12,22 +15,55 @@ class BaseSimObject(ABC):
     def __init__(self) -> None:
         self._loop_generator: LoopGenerator | None = None
 
-    def step(self) -> float | None:
+    def step(self) -> float | Event | None:
         """Checks if this object has an instantiated loop and runs it."""
         if self._loop_generator is None:
             self._loop_generator = self._loop()
         return next(self._loop_generator)
 
+    def restart(self) -> None:
+        """Start the loop over from the top at the next step, instead of resuming it.
+
+        Generators can't be serialized, so this is how objects are restored from a
+        snapshot. Snapshots are only taken where every loop can start over.
+        """
+        self._loop_generator = self._restarted_loop()
+
+    def _restarted_loop(self) -> LoopGenerator:
+        """The loop of a restarted object. Objects that do work after a yield, such as
+        stopping a timer, finish that work here before starting the loop over.
+
+        :yields: The same as _loop
+        """
+        yield from self._loop()
+
+    def get_state(self) -> dict[str, Any]:
+        """Get the state of the object that lives outside of its loop, for snapshots
+
+        :return: The state, as JSON-compatible values
+        """
+        return {}
+
+    def set_state(self, state: dict[str, Any]) -> None:  # noqa: B027
+        """Restore the state of the object from a snapshot. See get_state.
+
+        :param state: The state, as returned by get_state
+        """
+
     @abstractmethod
     def _loop(self) -> LoopGenerator:
-        """A generator that yields either None or a float.
+        """A generator that yields either None, a float, or an Event.
 
-        :yields: The amount of time to sleep for, or None
+        :yields: The amount of time to sleep for, an Event to wait on, or None
             - If None, that means that the function wants to yield back to the runtime,
               until the all other `run` loops have been called.
 
             - If a number, that means don't continue this function until the timestamp
               has incremented that exact amount.
+
+            - If an Event, that means don't continue this function until the event has
+              fired. This is equivalent to polling for the event with `yield None`,
+              but the object isn't stepped in the meantime.
         """
 
     @abstractmethod
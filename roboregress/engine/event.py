@@ -0,0 +1,23 @@
+from collections.abc import Callable
+
+
+class Event:
+    """Something that sim objects can wait on, by yielding it from their loop.
+
+    A waiting object isn't stepped at all until the event fires. At that point it
+    resumes as if it had been polling for the event with `yield None` all along. This
+    avoids stepping objects that have no chance of making progress.
+    """
+
+    def __init__(self) -> None:
+        self._waiters: list[Callable[[], None]] = []
+
+    def add_waiter(self, resume: Callable[[], None]) -> None:
+        """Register a callback to be called (once) the next time the event fires"""
+        self._waiters.append(resume)
+
+    def fire(self) -> None:
+        """Resume every object waiting on the event"""
+        waiters, self._waiters = self._waiters, []
+        for resume in waiters:
+            resume()
@@ -0,0 +1,101 @@
+from typing import Any
+
+from .event import Event
+
+
+class ObjectProfile:
+    """A record of how a single sim object was stepped"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.n_steps = 0
+        self.n_no_progress = 0
+        """Steps that yielded None, so the object is stepped again next step"""
+        self.n_sleeps = 0
+        self.n_event_waits = 0
+        self.wall_seconds = 0.0
+        """Wall-clock seconds spent inside the object's step()"""
+
+    def record(self, result: float | Event | None, wall_seconds: float) -> None:
+        """Record a single step of the object
+
+        :param result: What the step yielded
+        :param wall_seconds: How long the step took
+        """
+        self.n_steps += 1
+        self.wall_seconds += wall_seconds
+        if result is None:
+            self.n_no_progress += 1
+        elif isinstance(result, Event):
+            self.n_event_waits += 1
+        else:
+            self.n_sleeps += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "n_steps": self.n_steps,
+            "n_no_progress": self.n_no_progress,
+            "n_sleeps": self.n_sleeps,
+            "n_event_waits": self.n_event_waits,
+            "wall_seconds": self.wall_seconds,
+        }
+
+
+class RuntimeProfile:
+    """A record of where the wall-clock time of a runtime goes"""
+
+    def __init__(self) -> None:
+        self.objects: list[ObjectProfile] = []
+        """The profile of each sim object, in registration order"""
+
+        self.n_steps = 0
+        """How many times the runtime was stepped"""
+        self.n_event_resumes = 0
+        """How many times an event resumed an object that was waiting on it"""
+        self.wall_seconds = 0.0
+        """Wall-clock seconds spent inside SimulationRuntime.step"""
+        self.simulated_seconds = 0.0
+        """Simulated seconds that passed while profiling"""
+
+    @property
+    def engine_wall_seconds(self) -> float:
+        """Wall-clock seconds spent stepping, but outside of every sim object"""
+        return self.wall_seconds - sum(o.wall_seconds for o in self.objects)
+
+    @property
+    def steps_per_wall_second(self) -> float:
+        return self._per_wall_second(self.n_steps)
+
+    @property
+    def object_steps_per_wall_second(self) -> float:
+        return self._per_wall_second(sum(o.n_steps for o in self.objects))
+
+    @property
+    def event_resumes_per_wall_second(self) -> float:
+        return self._per_wall_second(self.n_event_resumes)
+
+    @property
+    def simulated_seconds_per_wall_second(self) -> float:
+        return self._per_wall_second(self.simulated_seconds)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "n_steps": self.n_steps,
+            "n_event_resumes": self.n_event_resumes,
+            "wall_seconds": self.wall_seconds,
+            "engine_wall_seconds": self.engine_wall_seconds,
+            "simulated_seconds": self.simulated_seconds,
+            "steps_per_wall_second": self.steps_per_wall_second,
+            "object_steps_per_wall_second": self.object_steps_per_wall_second,
+            "event_resumes_per_wall_second": self.event_resumes_per_wall_second,
+            "simulated_seconds_per_wall_second": (
+                self.simulated_seconds_per_wall_second
+            ),
+            "objects": [o.to_dict() for o in self.objects],
+        }
+
+    def _per_wall_second(self, count: float) -> float:
+        if self.wall_seconds == 0:
+            return 0
+        return count / self.wall_seconds
@@ -1,17 +1,21 @@
 import functools
+import heapq
 import operator
-import random
+import time
+from typing import Any
 
 import numpy as np
 import open3d as o3d
 from tqdm.auto import tqdm
 
 from .base_simulation_object import BaseSimObject
+from .event import Event
+from .profile import ObjectProfile, RuntimeProfile
+from .stopping_rule import BatchMeansStoppingRule
 from .visualizer import Visualizer
 
-# Make the system deterministic by setting the seed for numpy and python
-np.random.seed(1337)
-random.seed(1337)
+DEFAULT_SEED = 1337
+"""The seed runtimes use unless told otherwise, so runs are reproducible by default"""
 
 
 class NoObjectsToStep(Exception):
@@ -25,36 +29,167 @@ class NoTimestampProgression(Exception):
 class SimulationRuntime:
     """An object that can run the simulation engine"""
 
-    def __init__(self) -> None:
+    def __init__(self, seed: int | None = DEFAULT_SEED) -> None:
+        """
+        :param seed: The seed for every random stream of the simulation. If None, the
+            simulation won't be reproducible.
+        """
+        self._seed_sequence = np.random.SeedSequence(seed)
+        """Spawns an independent random stream for each user of randomness"""
+
         self._timestamp: float = 0
         self._sim_objects: list[BaseSimObject] = []
-        self._sleeping_objects: dict[BaseSimObject, float] = {}
-        """Holds a list of objects currently waiting to be reactivated once a certain
-        timestamp is reached."""
+
+        self._registration_order: dict[BaseSimObject, int] = {}
+        """The index each object was registered at, used to step objects in order"""
+        self._runnable: set[int] = set()
+        """The registration indices of objects that aren't sleeping"""
+        self._wake_queue: list[tuple[float, int, BaseSimObject]] = []
+        """A heap of (wake timestamp, registration index, object) for every sleeping
+        object, so the next objects to wake can be found without a full scan. The
+        registration index breaks ties, so objects waking together run in order."""
+
+        self._n_steps = 0
+        """The total number of times the runtime has been stepped"""
+
+        self._step_queue: list[int] = []
+        """A heap of the registration indices left to step in the current step"""
+        self._stepping_index = -1
+        """The registration index of the object currently being stepped"""
+
+        self.profile: RuntimeProfile | None = None
+        """Where the wall-clock time of the runtime goes, once profiling is enabled"""
 
     @property
     def timestamp(self) -> float:
         """A read-only getter for the timestamp property"""
         return self._timestamp
 
+    @property
+    def n_steps(self) -> int:
+        """The total number of steps the runtime has taken"""
+        return self._n_steps
+
+    def spawn_rng(self) -> np.random.Generator:
+        """Create a random generator with a stream independent of every other generator
+        spawned by this runtime
+
+        :return: The generator. Generators are derived from the seed in the order
+            they're spawned.
+        """
+        (seed_sequence,) = self._seed_sequence.spawn(1)
+        return np.random.default_rng(seed_sequence)
+
+    def enable_profiling(self) -> RuntimeProfile:
+        """Start recording how every object is stepped, and how long it takes. This
+        adds a little overhead to every step.
+
+        :return: The profile, which is updated as the runtime steps
+        """
+        if self.profile is None:
+            self.profile = RuntimeProfile()
+            self.profile.objects = [
+                ObjectProfile(type(o).__name__) for o in self._sim_objects
+            ]
+        return self.profile
+
+    def get_state(self) -> dict[str, Any]:
+        """Get the state of the runtime and every sim object, for snapshots
+
+        Event waiters can't be serialized, so every object must be runnable or
+        sleeping. Each object's loop must also be able to start over from the top,
+        which is up to the caller to ensure.
+
+        :raises ValueError: If the runtime is mid-step, or an object waits on an event
+        :return: The state, as JSON-compatible values
+        """
+        if self._stepping_index != -1:
+            raise ValueError(
+                "The runtime can't be snapshotted in the middle of a step!"
+            )
+        if len(self._runnable) + len(self._wake_queue) != len(self._sim_objects):
+            raise ValueError("Objects waiting on events can't be snapshotted!")
+
+        return {
+            "timestamp": self._timestamp,
+            "n_steps": self._n_steps,
+            "runnable": sorted(self._runnable),
+            "wake_queue": [
+                [wake, index] for wake, index, _ in sorted(self._wake_queue)
+            ],
+            "objects": [[type(o).__name__, o.get_state()] for o in self._sim_objects],
+        }
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        """Restore the runtime and every sim object from a snapshot, and restart the
+        loop of every object. See get_state.
+
+        :param state: The state, as returned by get_state
+        :raises ValueError: If the registered objects don't match those of the state
+        """
+        object_types = [name for name, _ in state["objects"]]
+        if object_types != [type(o).__name__ for o in self._sim_objects]:
+            raise ValueError(
+                f"The state is of different sim objects than are registered! "
+                f"{object_types=}"
+            )
+
+        for sim_object, (_, object_state) in zip(
+            self._sim_objects, state["objects"], strict=True
+        ):
+            sim_object.set_state(object_state)
+            sim_object.restart()
+
+        self._timestamp = state["timestamp"]
+        self._n_steps = state["n_steps"]
+        self._runnable = set(state["runnable"])
+        # A sorted list is already a valid heap
+        self._wake_queue = [
+            (wake, index, self._sim_objects[index])
+            for wake, index in state["wake_queue"]
+        ]
+
     def register(self, *sim_objects: BaseSimObject) -> None:
         """Register a new sim object with the runtime"""
         for sim_obj in sim_objects:
-            assert sim_obj not in self._sim_objects
+            assert sim_obj not in self._registration_order
+            index = len(self._sim_objects)
             self._sim_objects.append(sim_obj)
+            self._registration_order[sim_obj] = index
+            self._runnable.add(index)
+            if self.profile is not None:
+                self.profile.objects.append(ObjectProfile(type(sim_obj).__name__))
 
     def step(self) -> None:
         """Step the simulation
 
+        Only the objects that are due to wake at the next timestamp, and the objects
+        that aren't sleeping, are stepped. They're stepped in registration order.
+
         :raises NoObjectsToStep: If the runtime has no objects registered
-        :raises ValueError: If there's an unexpected inconsistency with timestamps
         """
         if len(self._sim_objects) == 0:
             raise NoObjectsToStep("The runtime has no associated objects!")
+        self._n_steps += 1
+
+        if self.profile is not None:
+            start_time, start_timestamp = time.perf_counter(), self._timestamp
+            self._step()
+            self.profile.n_steps += 1
+            self.profile.wall_seconds += time.perf_counter() - start_time
+            self.profile.simulated_seconds += self._timestamp - start_timestamp
+        else:
+            self._step()
+
+    def _step(self) -> None:
+        """Wake the objects due at the next timestamp, and step every runnable object
 
-        # Get the next-to-awake timestamp in the _sleeping_objects list
-        if len(self._sleeping_objects):
-            next_awake_timestamp = sorted(self._sleeping_objects.values())[0]
+        :raises ValueError: If there's an unexpected inconsistency with timestamps
+        """
+        # Get the next-to-awake timestamp from the wake queue, and wake every object
+        # that is due at that timestamp
+        if len(self._wake_queue):
+            next_awake_timestamp = self._wake_queue[0][0]
             if next_awake_timestamp < self._timestamp:
                 raise ValueError(
                     f"All sleeping objects should be woken on the same timestamp! "
@@ -62,40 +197,92 @@ class SimulationRuntime:
                 )
             self._timestamp = next_awake_timestamp
 
-        for sim_object in self._sim_objects:
-            # If this object is asleep and it's not yet time to wake them, don't step
-            if sim_object in self._sleeping_objects:
-                if self._timestamp < self._sleeping_objects[sim_object]:
-                    continue
-                else:
-                    wake_ts = self._sleeping_objects.pop(sim_object)
-                    assert wake_ts == self._timestamp
+            while self._wake_queue and self._wake_queue[0][0] == self._timestamp:
+                _, index, _ = heapq.heappop(self._wake_queue)
+                self._runnable.add(index)
 
+        # A sorted list is already a valid heap
+        self._step_queue = sorted(self._runnable)
+        try:
+            while self._step_queue:
+                self._stepping_index = heapq.heappop(self._step_queue)
+                self._step_object(self._stepping_index)
+        finally:
+            self._stepping_index = -1
+
+    def _step_object(self, index: int) -> None:
+        """Step a single object, and put it to sleep or make it wait if requested"""
+        sim_object = self._sim_objects[index]
+        if self.profile is not None:
+            start_time = time.perf_counter()
+            sleep_seconds = sim_object.step()
+            self.profile.objects[index].record(
+                sleep_seconds, time.perf_counter() - start_time
+            )
+        else:
             sleep_seconds = sim_object.step()
 
-            if sleep_seconds is not None:
-                assert isinstance(sleep_seconds, float)
-                if sleep_seconds <= 0:
-                    raise ValueError(
-                        f"Sleep must be a positive number! {sleep_seconds}"
-                    )
+        if isinstance(sleep_seconds, Event):
+            self._runnable.remove(index)
+            sleep_seconds.add_waiter(functools.partial(self._resume, index))
+        elif sleep_seconds is not None:
+            assert isinstance(sleep_seconds, float)
+            if sleep_seconds <= 0:
+                raise ValueError(f"Sleep must be a positive number! {sleep_seconds}")
 
-                self._sleeping_objects[sim_object] = self.timestamp + sleep_seconds
+            wake_timestamp = self.timestamp + sleep_seconds
+            self._runnable.remove(index)
+            heapq.heappush(self._wake_queue, (wake_timestamp, index, sim_object))
+
+    def _resume(self, index: int) -> None:
+        """Resume an object that was waiting on an event that has now fired"""
+        self._runnable.add(index)
+        if self.profile is not None:
+            self.profile.n_event_resumes += 1
+
+        # A polling object registered after the one that fired the event would have
+        # seen the change during this same step, so step it during this step too
+        if self._stepping_index != -1 and index > self._stepping_index:
+            heapq.heappush(self._step_queue, index)
 
     def step_until(
-        self, timestamp: float, visualizer: Visualizer | None = None
+        self,
+        timestamp: float,
+        visualizer: Visualizer | None = None,
+        progress_interval: float | None = 0.1,
+        stopping_rule: BatchMeansStoppingRule | None = None,
     ) -> None:
-        """Run the engine until it is at or past the specified timestamp"""
+        """Run the engine until it is at or past the specified timestamp
+
+        :param timestamp: The timestamp to run until
+        :param visualizer: If set, the simulation is drawn after every step that
+            progressed the timestamp.
+        :param progress_interval: The minimum wall-clock seconds between progress bar
+            updates. If None, no progress bar is shown at all.
+        :param stopping_rule: If set, the engine stops before the timestamp as soon
+            as the rule is satisfied.
+        :raises NoTimestampProgression: If the simulation objects stop progressing time
+        """
         consecutive_steps_without_change = 0
         """Track if theres ever more than 1 step in a row where the timestamp didn't
         increment. This can happen if the objects aren't yielding sleeps, which means
         the user of this runtime isn't actually doing anything useful with it...
         """
-        with tqdm(total=timestamp, unit="s") as progress_bar:
+        next_progress_update = 0.0
+        if stopping_rule is not None:
+            stopping_rule.update(self._timestamp)
+
+        with tqdm(
+            total=timestamp, unit="s", disable=progress_interval is None
+        ) as progress_bar:
             while self._timestamp < timestamp:
-                # Update progress bar
-                progress_bar.n = round(self._timestamp)
-                progress_bar.refresh(progress_bar.lock_args)
+                # Update progress bar, at most once every progress_interval
+                if progress_interval is not None:
+                    now = time.monotonic()
+                    if now >= next_progress_update:
+                        progress_bar.n = round(self._timestamp)
+                        progress_bar.refresh(progress_bar.lock_args)
+                        next_progress_update = now + progress_interval
 
                 # Update visualization
                 if visualizer and consecutive_steps_without_change == 0:
@@ -124,3 +311,11 @@ class SimulationRuntime:
                         f"that the simulation objects in the engine aren't requesting "
                         f"sleeps! Is there a logic error somewhere?"
                     )
+
+                if stopping_rule is not None and stopping_rule.update(self._timestamp):
+                    break
+
+            # Show the final state of the progress bar
+            if progress_interval is not None:
+                progress_bar.n = round(self._timestamp)
+                progress_bar.refresh(progress_bar.lock_args)
@@ -0,0 +1,124 @@
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+from scipy import stats
+
+DEFAULT_BATCH_SECONDS = 5 * 60
+"""The simulated duration of each batch, unless told otherwise"""
+
+
+class BatchMeansStoppingRule:
+    """Decides when a simulation has measured the long-run rate of some cumulative
+    quantity, such as meters of wood processed, precisely enough to stop.
+
+    Simulated time is split into batches, and the rate is measured over each batch.
+    Batches long enough to be roughly independent give a confidence interval on the
+    long-run rate. The first batches are skewed by the warm-up of the simulation, so
+    they're dropped using the MSER rule: the warm-up is the prefix of batches whose
+    removal minimizes the standard error of the rest.
+    """
+
+    def __init__(
+        self,
+        measure: Callable[[], float],
+        tolerance: float,
+        batch_seconds: float = DEFAULT_BATCH_SECONDS,
+        confidence: float = 0.95,
+        min_batches: int = 10,
+    ):
+        """
+        :param measure: Returns the current value of the cumulative quantity
+        :param tolerance: Stop once the half-width of the confidence interval is at
+            most this fraction of the rate
+        :param batch_seconds: The shortest simulated duration of a batch
+        :param confidence: The confidence level of the interval
+        :param min_batches: The fewest batches after the warm-up to stop with
+        """
+        self.tolerance = tolerance
+        self.batch_seconds = batch_seconds
+        self.confidence = confidence
+        self.min_batches = min_batches
+        self._measure = measure
+
+        self.batch_rates: list[float] = []
+        """The rate of the quantity over each finished batch"""
+        self._batch_starts: list[tuple[float, float]] = []
+        """The timestamp and value of the quantity at the start of each batch,
+        including the batch currently in progress"""
+
+        self.warmup_batches = 0
+        """How many of the first batches are dropped as warm-up"""
+        self.rate: float | None = None
+        """The mean rate after the warm-up, once there are enough batches"""
+        self.half_width: float | None = None
+        """The half-width of the confidence interval on the rate"""
+
+    @property
+    def converged(self) -> bool:
+        if self.rate is None or self.half_width is None:
+            return False
+        return self.half_width <= self.tolerance * abs(self.rate)
+
+    @property
+    def warmup_seconds(self) -> float:
+        if not self._batch_starts:
+            return 0
+        return self._batch_starts[self.warmup_batches][0] - self._batch_starts[0][0]
+
+    def update(self, timestamp: float) -> bool:
+        """Measure the quantity, if a batch has ended
+
+        :param timestamp: The current timestamp of the simulation
+        :return: True if the simulation can stop
+        """
+        if not self._batch_starts:
+            self._batch_starts.append((timestamp, self._measure()))
+            return False
+
+        start_time, start_value = self._batch_starts[-1]
+        if timestamp - start_time < self.batch_seconds:
+            return self.converged
+
+        value = self._measure()
+        self.batch_rates.append((value - start_value) / (timestamp - start_time))
+        self._batch_starts.append((timestamp, value))
+        self._update_interval()
+        return self.converged
+
+    def get_state(self) -> dict[str, Any]:
+        """Get the batches measured so far, for snapshots
+
+        :return: The state, as JSON-compatible values
+        """
+        return {
+            "batch_rates": list(self.batch_rates),
+            "batch_starts": [list(start) for start in self._batch_starts],
+        }
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        """Restore the batches from a snapshot, and recompute the interval on them
+        with the tolerance and confidence of this rule. See get_state.
+
+        :param state: The state, as returned by get_state
+        """
+        self.batch_rates = list(state["batch_rates"])
+        self._batch_starts = [(start[0], start[1]) for start in state["batch_starts"]]
+        self._update_interval()
+
+    def _update_interval(self) -> None:
+        rates = np.array(self.batch_rates)
+
+        # Search for the warm-up in the first half of the batches, where MSER is stable
+        mser = [np.var(rates[d:]) / (len(rates) - d) for d in range(len(rates) // 2)]
+        self.warmup_batches = int(np.argmin(mser)) if mser else 0
+
+        steady_rates = rates[self.warmup_batches :]
+        if len(steady_rates) < self.min_batches:
+            self.rate = self.half_width = None
+            return
+
+        t_value = stats.t.ppf((1 + self.confidence) / 2, df=len(steady_rates) - 1)
+        standard_error = steady_rates.std(ddof=1) / np.sqrt(len(steady_rates))
+        self.rate = float(steady_rates.mean())
+        self.half_width = float(t_value * standard_error)
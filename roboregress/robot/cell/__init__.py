@@ -2,5 +2,6 @@ from .base_robot_cell import BaseRobotCell
 from .big_bird import BigBird
 from .rake import Rake
 from .rolling_rake import RollingRake
+from .surface_cell_group import SurfaceCellGroup
 
 __all__ = ["BaseRobotCell", "Rake", "BigBird"]
@@ -1,4 +1,7 @@
-from roboregress.wood import Wood
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+from roboregress.wood import Fastener, Wood
 
 
 class BaseRakeMixin:
@@ -9,6 +12,18 @@ class BaseRakeMixin:
     color = (1, 0, 0)
     _last_rake_wood_pos = 0.0
     """Keep track of the position of the wood, to know what has and hasn't been raked"""
+    _state_attributes: tuple[str, ...] = ("_last_rake_wood_pos",)
+
+    if TYPE_CHECKING:
+        # Provided by BaseRobotCell, which rakes also inherit from. It's only declared
+        # here for type checking, so it doesn't shadow the implementation.
+        @property
+        def pick_seconds(self) -> float:
+            """The seconds it takes to run the rake once"""
+
+    def expected_work_seconds(self, fastener_types: Iterable[Fastener]) -> float:
+        """A rake attempts every fastener in its swath at once, in a single pass"""
+        return self.pick_seconds if any(True for _ in fastener_types) else 0
 
     def _get_distance_to_rake_to(
         self, wood: Wood, workspace_start: float, workspace_end: float = float("inf")
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
 from math import pi
-from typing import TYPE_CHECKING, Generic, TypeVar
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
 
 import numpy as np
 import numpy.typing as npt
@@ -14,10 +15,17 @@ from roboregress.robot.vis_constants import (
     ROBOT_HEIGHT,
     ROBOT_WIDTH,
 )
-from roboregress.wood import SURFACE_NORMALS, Fastener, MoveScheduled, Surface, Wood
+from roboregress.wood import (
+    SURFACE_NORMALS,
+    Fastener,
+    MoveScheduled,
+    PickRequest,
+    Surface,
+    Wood,
+)
 
 if TYPE_CHECKING:
-    from roboregress.robot.statistics import StatsTracker
+    from roboregress.robot.statistics import RobotStats, StatsTracker
 
 BaseParams = TypeVar("BaseParams", bound="BaseRobotCell.Parameters")
 
@@ -39,43 +47,124 @@ class BaseRobotCell(BaseSimObject, ABC, Generic[BaseParams]):
         def end_pos(self) -> float:
             return self.start_pos + self.working_width
 
+        @property
+        def pick_seconds(self) -> float:
+            """The seconds it takes to run a single pick attempt. Every cell's
+            parameters must override this.
+
+            :raises NotImplementedError: If the parameters don't override this
+            """
+            raise NotImplementedError(
+                f"{type(self).__name__} doesn't define pick_seconds"
+            )
+
     def __init__(
-        self, parameters: BaseParams, wood: Wood, stats_tracker: "StatsTracker"
+        self,
+        parameters: BaseParams,
+        wood: Wood,
+        stats_tracker: "StatsTracker",
+        rng: np.random.Generator | None = None,
     ):
         """
         :param parameters: The pydantic parameters for the robot cell.
         :param wood: The wood to pick from
         :param stats_tracker: The global stats tracker object
+        :param rng: The random generator to draw the outcomes of this cell's picks
+            from. If not set, the wood's generator is used.
         """
         super().__init__()
         self.params = parameters
         self._wood = wood
+        self._rng = rng
         self._stats = stats_tracker.create_robot_stats_tracker(self)
 
         assert all(
             p > 0 for p in self.params.pick_probabilities.values()
         ), "Pick probabilities must be nonzero!"
 
+    _state_attributes: tuple[str, ...] = ()
+    """Attributes that cells keep across picks, to be saved in snapshots"""
+
+    @property
+    def stats(self) -> "RobotStats":
+        """The statistics of this robot cell"""
+        return self._stats
+
+    def attempt_pick(self) -> float:
+        """Run a single unit of picking, and record the picked fasteners.
+        The work lock of the wood must be held.
+
+        :return: The seconds the picking takes, or 0 if there was nothing to do
+        """
+        fasteners, pick_time = self._run_pick()
+        self.record_pick(fasteners, pick_time)
+        return pick_time
+
+    def pick_request(self) -> PickRequest | None:
+        """The pick a single unit of picking makes, so that the picks of many cells
+        can be resolved at once with Wood.pick_many
+
+        :return: The request, or None if this cell's picking isn't a single pick of
+            the wood, as for rakes
+        """
+        return None
+
+    def record_pick(self, fasteners: list[Fastener], pick_time: float) -> None:
+        """Record a unit of picking, whether run by attempt_pick or resolved from
+        the cell's pick_request by someone else
+
+        :param fasteners: The fasteners that were picked
+        :param pick_time: The seconds the picking takes
+        """
+        assert pick_time >= 0
+        self._stats.n_picked_fasteners += len(fasteners)
+
     def _loop(self) -> LoopGenerator:
         while True:
             try:
                 with self._wood.work_lock():
-                    fasteners, pick_time = self._run_pick()
-                    assert pick_time >= 0
-
-                    self._stats.n_picked_fasteners += len(fasteners)
+                    pick_time = self.attempt_pick()
                     if pick_time > 0:
                         with self._stats.work_timer.time():
                             yield pick_time
 
-                # Since no work was done, yield (outside the work lock) to give
-                # the conveyor the chance to move
+                # Since no work was done, wait (outside the work lock) to give
+                # the conveyor the chance to move. There won't be new work until then.
                 if pick_time == 0:
-                    yield None
+                    yield self._wood.moved
             except MoveScheduled:
                 # No new work is allowed, a wood movement has been scheduled
                 with self._stats.waiting_for_wood_timer.time():
-                    yield None
+                    yield self._wood.moved
+
+    def _restarted_loop(self) -> LoopGenerator:
+        # Snapshots are taken while the wood moves, so the cell may have been waiting
+        timer = self._stats.waiting_for_wood_timer
+        if timer.currently_working:
+            timer.stop_working()
+        yield from self._loop()
+
+    def get_state(self) -> dict[str, Any]:
+        """Get the statistics and random state of the cell, for snapshots
+
+        :return: The state, as JSON-compatible values
+        """
+        return {
+            "stats": self._stats.get_state(),
+            "rng": None if self._rng is None else self._rng.bit_generator.state,
+            **{name: getattr(self, name) for name in self._state_attributes},
+        }
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        """Restore the cell from a snapshot. See get_state.
+
+        :param state: The state, as returned by get_state
+        """
+        self._stats.set_state(state["stats"])
+        if self._rng is not None:
+            self._rng.bit_generator.state = state["rng"]
+        for name in self._state_attributes:
+            setattr(self, name, state[name])
 
     def __repr__(self) -> str:
         return (
@@ -98,6 +187,26 @@ class BaseRobotCell(BaseSimObject, ABC, Generic[BaseParams]):
     def color(self) -> tuple[float, float, float]:
         """The color to use when visualizing this robot cell"""
 
+    @property
+    def pick_seconds(self) -> float:
+        """The seconds it takes to run a single pick attempt"""
+        return self.params.pick_seconds
+
+    def expected_work_seconds(self, fastener_types: Iterable[Fastener]) -> float:
+        """Estimate how long it would take this cell to pick all the given fasteners.
+
+        By default, cells attempt one fastener at a time, and retry each fastener
+        until it's picked. Cells that attempt several fasteners at once override this.
+
+        :param fastener_types: The types of the fasteners to pick. They must all be
+            pickable by this cell.
+        :return: The expected seconds of work
+        """
+        return sum(
+            self.pick_seconds / self.params.pick_probabilities[fastener_type]
+            for fastener_type in fastener_types
+        )
+
     @abstractmethod
     def _run_pick(self) -> tuple[list[Fastener], float]:
         """Do the smallest amount of picking that this robot can do in a single unit,
@@ -14,8 +14,17 @@ class RollingRake(BaseRakeMixin, BaseRobotCell["RollingRake.Parameters"]):
         rolling_rake_cycle_seconds: float
         """The seconds it takes to run the rake once"""
 
+        aggregate_rake: bool = False
+        """If True, each swath is resolved by sampling how many fasteners of each type
+        are picked, instead of attempting every fastener on its own. This is cheaper
+        and statistically equivalent, but changes the random outcomes."""
+
         working_width: float = 0
 
+        @property
+        def pick_seconds(self) -> float:
+            return self.rolling_rake_cycle_seconds
+
     def _run_pick(self) -> tuple[list[Fastener], float]:
         rake_to = self._get_distance_to_rake_to(
             wood=self._wood, workspace_start=self.params.start_pos
@@ -23,15 +32,25 @@ class RollingRake(BaseRakeMixin, BaseRobotCell["RollingRake.Parameters"]):
         if rake_to == self.params.start_pos:
             return [], 0
 
-        fasteners, _ = self._wood.pick(
-            start_pos=self.params.start_pos,
-            end_pos=rake_to,
-            from_surface=self.params.pickable_surface,
-            pick_probabilities=self.params.pick_probabilities,
-            # The rake can pick 'unlimited' amounts of fasteners per rake
-            n_fasteners_to_sample=None,
-        )
-        return fasteners, self.params.rolling_rake_cycle_seconds
+        if self.params.aggregate_rake:
+            fasteners = self._wood.pick_swath(
+                start_pos=self.params.start_pos,
+                end_pos=rake_to,
+                from_surface=self.params.pickable_surface,
+                pick_probabilities=self.params.pick_probabilities,
+                rng=self._rng,
+            )
+        else:
+            fasteners, _ = self._wood.pick(
+                start_pos=self.params.start_pos,
+                end_pos=rake_to,
+                from_surface=self.params.pickable_surface,
+                pick_probabilities=self.params.pick_probabilities,
+                # The rake can pick 'unlimited' amounts of fasteners per rake
+                n_fasteners_to_sample=None,
+                rng=self._rng,
+            )
+        return fasteners, self.pick_seconds
 
     def draw(self) -> list[o3d.geometry.Geometry]:
         cylinder: o3d.geometry.TriangleMesh = o3d.geometry.TriangleMesh.create_cylinder(
@@ -1,4 +1,4 @@
-from roboregress.wood import Fastener
+from roboregress.wood import Fastener, PickRequest
 
 from .base_robot_cell import BaseRobotCell
 
@@ -10,13 +10,21 @@ class ScrewManipulator(BaseRobotCell["ScrewManipulator.Parameters"]):
         screw_pick_seconds: float
         """The seconds it takes to pick a screw, for the screw manipulator"""
 
-    def _run_pick(self) -> tuple[list[Fastener], float]:
-        fasteners, attempted_pick = self._wood.pick(
+        @property
+        def pick_seconds(self) -> float:
+            return self.screw_pick_seconds
+
+    def pick_request(self) -> PickRequest:
+        return PickRequest(
+            from_surface=self.params.pickable_surface,
             start_pos=self.params.start_pos,
             end_pos=self.params.end_pos,
-            from_surface=self.params.pickable_surface,
             pick_probabilities=self.params.pick_probabilities,
             # ScrewManipulator can only pick one fastener at a time
             n_fasteners_to_sample=1,
+            rng=self._rng,
         )
-        return fasteners, self.params.screw_pick_seconds if attempted_pick else 0
+
+    def _run_pick(self) -> tuple[list[Fastener], float]:
+        fasteners, attempted_pick = self._wood.pick_many([self.pick_request()])[0]
+        return fasteners, self.pick_seconds if attempted_pick else 0
@@ -0,0 +1,131 @@
+import contextlib
+from typing import Any
+
+import open3d as o3d
+
+from roboregress.engine import BaseSimObject
+from roboregress.engine.base_simulation_object import LoopGenerator
+from roboregress.wood import MoveScheduled, PickRequest, Wood
+
+from .base_robot_cell import BaseRobotCell
+
+
+class SurfaceCellGroup(BaseSimObject):
+    """Runs the arms of a single physical cell, one per surface, as one sim object.
+
+    Each arm is a regular robot cell, and keeps its own parameters and statistics, but
+    isn't registered with the runtime itself. Instead, the group steps every arm, and
+    resolves the picks of all arms with a single Wood.pick_many call per wake-up.
+
+    Arms behave just as they would if they were registered on their own: arms without
+    work wait for the wood to move, while the other arms keep picking. Arms share all
+    parameters except their surface, so every busy arm takes the same time to pick.
+    """
+
+    def __init__(self, arms: list[BaseRobotCell[Any]], wood: Wood):
+        """
+        :param arms: The arms of the cell, in the order they'd be stepped by the
+            runtime. They must share all parameters except for pickable_surface.
+        :param wood: The wood being picked from
+        """
+        super().__init__()
+        assert len({type(arm) for arm in arms}) == 1, "Arms must be the same type!"
+        assert len({arm.params.pickable_surface for arm in arms}) == len(arms)
+
+        self.arms = arms
+        self._wood = wood
+
+    def _attempt_picks(self, idle: set[int]) -> dict[int, float]:
+        """Have every arm that isn't idle attempt a pick. The work lock must be held.
+
+        :param idle: The indices of idle arms. Arms that find no work are added to it.
+        :return: The pick time of every arm that is now busy, by index
+        """
+        pick_times: dict[int, float] = {}
+        requests: dict[int, PickRequest] = {}
+        for i, arm in enumerate(self.arms):
+            if i in idle:
+                continue
+            request = arm.pick_request()
+            if request is None:
+                # Cells that don't pick with a single request, like rakes, pick alone
+                pick_times[i] = arm.attempt_pick()
+            else:
+                requests[i] = request
+
+        # Resolve the picks of every other arm at once
+        results = self._wood.pick_many(list(requests.values()))
+        for i, (fasteners, attempted_pick) in zip(requests, results, strict=True):
+            arm = self.arms[i]
+            pick_times[i] = arm.pick_seconds if attempted_pick else 0
+            arm.record_pick(fasteners, pick_times[i])
+
+        for i, pick_time in list(pick_times.items()):
+            if pick_time == 0:
+                idle.add(i)
+                del pick_times[i]
+        return pick_times
+
+    def _loop(self) -> LoopGenerator:
+        idle: set[int] = set()
+        """The indices of arms without work, which are waiting for the wood to move"""
+
+        while True:
+            try:
+                with self._wood.work_lock():
+                    pick_times = self._attempt_picks(idle)
+                    if pick_times:
+                        assert (
+                            len(set(pick_times.values())) == 1
+                        ), "Every busy arm should take the same time to pick!"
+                        with contextlib.ExitStack() as timers:
+                            for i in pick_times:
+                                timers.enter_context(
+                                    self.arms[i].stats.work_timer.time()
+                                )
+                            yield next(iter(pick_times.values()))
+
+                # Once no arm has work, wait (outside the work lock) to give the
+                # conveyor the chance to move. There won't be new work until then.
+                if len(idle) == len(self.arms):
+                    yield self._wood.moved
+                    idle.clear()
+            except MoveScheduled:
+                # No new work is allowed, a wood movement has been scheduled
+                with contextlib.ExitStack() as timers:
+                    for i, arm in enumerate(self.arms):
+                        if i not in idle:
+                            timers.enter_context(
+                                arm.stats.waiting_for_wood_timer.time()
+                            )
+                    yield self._wood.moved
+                idle.clear()
+
+    def _restarted_loop(self) -> LoopGenerator:
+        # Snapshots are taken while the wood moves, so arms may have been waiting
+        for arm in self.arms:
+            timer = arm.stats.waiting_for_wood_timer
+            if timer.currently_working:
+                timer.stop_working()
+        yield from self._loop()
+
+    def get_state(self) -> dict[str, Any]:
+        """Get the state of every arm, for snapshots
+
+        :return: The state, as JSON-compatible values
+        """
+        return {"arms": [arm.get_state() for arm in self.arms]}
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        """Restore every arm from a snapshot. See get_state.
+
+        :param state: The state, as returned by get_state
+        """
+        for arm, arm_state in zip(self.arms, state["arms"], strict=True):
+            arm.set_state(arm_state)
+
+    def draw(self) -> list[o3d.geometry.Geometry]:
+        geometries: list[o3d.geometry.Geometry] = []
+        for arm in self.arms:
+            geometries += arm.draw()
+        return geometries
@@ -1,16 +1,24 @@
+from enum import Enum
 from pathlib import Path
 from typing import Any
 
 import yaml
 from pydantic import BaseModel
 
-from roboregress.engine import SimulationRuntime
-from roboregress.robot.cell import BaseRobotCell, BigBird, Rake, RollingRake
+from roboregress.engine import DEFAULT_SEED, BaseSimObject, SimulationRuntime
+from roboregress.robot.cell import (
+    BaseRobotCell,
+    BigBird,
+    Rake,
+    RollingRake,
+    SurfaceCellGroup,
+)
 from roboregress.robot.cell.screw_manipulator import ScrewManipulator
 from roboregress.robot.conveyor import (
     DumbWoodConveyor,
     GreedyBusynessWoodConveyor,
     GreedyDistanceWoodConveyor,
+    LookaheadWoodConveyor,
 )
 from roboregress.robot.statistics import StatsTracker
 from roboregress.wood import Surface, Wood
@@ -19,9 +27,12 @@ from roboregress.wood import Surface, Wood
 class SimConfig(BaseModel):
     wood: Wood.Parameters
 
+    # GreedyDistanceWoodConveyor is last, since its parameters are a subset of the
+    # parameters of every other conveyor
     conveyor: (
         GreedyBusynessWoodConveyor.Parameters
         | DumbWoodConveyor.Parameters
+        | LookaheadWoodConveyor.Parameters
         | GreedyDistanceWoodConveyor.Parameters
     )
 
@@ -31,6 +42,10 @@ class SimConfig(BaseModel):
     default_cell_width: float
     """Workspace within a cell"""
 
+    group_cell_surfaces: bool = False
+    """If True, the arms for every surface of a cell are run by a single sim object,
+    which cuts the number of objects the runtime steps by 4x"""
+
     pickers: list[
         Rake.Parameters
         | BigBird.Parameters
@@ -43,6 +58,7 @@ CONVEYOR_MAPPING = {
     DumbWoodConveyor.Parameters: DumbWoodConveyor,
     GreedyDistanceWoodConveyor.Parameters: GreedyDistanceWoodConveyor,
     GreedyBusynessWoodConveyor.Parameters: GreedyBusynessWoodConveyor,
+    LookaheadWoodConveyor.Parameters: LookaheadWoodConveyor,
 }
 ROBOT_MAPPING: dict[type[BaseModel], type[BaseRobotCell[Any]]] = {
     Rake.Parameters: Rake,
@@ -52,17 +68,41 @@ ROBOT_MAPPING: dict[type[BaseModel], type[BaseRobotCell[Any]]] = {
 }
 
 
-def runtime_from_file(file: Path) -> tuple[SimulationRuntime, StatsTracker]:
+def load_config(file: Path) -> SimConfig:
     with file.open() as f:
-        config = SimConfig.parse_obj(yaml.safe_load(f))
+        return SimConfig.parse_obj(yaml.safe_load(f))
 
-    runtime = SimulationRuntime()
 
-    wood = Wood(parameters=config.wood)
-    stats = StatsTracker(runtime=runtime, wood=wood)
+def config_to_dict(config: SimConfig) -> dict[str, Any]:
+    """Convert a configuration to JSON-compatible values, which parse back into an
+    equal configuration
+
+    :param config: The configuration to convert
+    :return: The configuration as a dict of JSON-compatible values
+    """
+    converted: dict[str, Any] = _jsonable(config.dict())
+    return converted
+
+
+def _jsonable(value: Any) -> Any:
+    """Convert enums, including those used as dict keys, to their values"""
+    if isinstance(value, dict):
+        return {_jsonable(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, list | tuple):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, Enum):
+        return value.value
+    return value
 
+
+def resolve_layout(config: SimConfig) -> SimConfig:
+    """Fill in the position and working width of every picker that wasn't configured
+
+    :param config: The configuration to resolve. It isn't modified.
+    :return: A copy of the configuration, with every picker fully placed
+    """
+    config = config.copy(deep=True)
     pos = 0.0
-    cells = []
     for params in config.pickers:
         if params.start_pos == -1:
             # Don't autopopulate position, this one is manually configured
@@ -71,17 +111,58 @@ def runtime_from_file(file: Path) -> tuple[SimulationRuntime, StatsTracker]:
         if params.working_width == -1:
             params.working_width = config.default_cell_width
 
+        pos += config.default_cell_distance + params.working_width
+    return config
+
+
+def runtime_from_file(
+    file: Path, seed: int | None = DEFAULT_SEED
+) -> tuple[SimulationRuntime, StatsTracker]:
+    """Create a runtime from a configuration file
+
+    :param file: The configuration file
+    :param seed: The seed for every random stream of the simulation. The board and
+        the picks of each robot cell each get their own independent stream.
+    :return: The runtime, and the stats tracker of the simulation
+    """
+    return runtime_from_config(load_config(file), seed=seed)
+
+
+def runtime_from_config(
+    config: SimConfig, seed: int | None = DEFAULT_SEED
+) -> tuple[SimulationRuntime, StatsTracker]:
+    """Create a runtime from a configuration. See runtime_from_file for details."""
+    config = resolve_layout(config)
+    runtime = SimulationRuntime(seed=seed)
+
+    wood = Wood(parameters=config.wood, rng=runtime.spawn_rng())
+    stats = StatsTracker(runtime=runtime, wood=wood)
+
+    cells = []
+    sim_objects: list[BaseSimObject] = []
+    for params in config.pickers:
+        arms = []
         for surface in Surface:
             robot_type = ROBOT_MAPPING[type(params)]
             updated_surface_params = params.copy(update={"pickable_surface": surface})
-            robot = robot_type(updated_surface_params, wood, stats)
-            cells.append(robot)
+            robot = robot_type(
+                updated_surface_params, wood, stats, rng=runtime.spawn_rng()
+            )
+            arms.append(robot)
+        cells += arms
 
-        pos += config.default_cell_distance + params.working_width
+        if config.group_cell_surfaces:
+            sim_objects.append(SurfaceCellGroup(arms=arms, wood=wood))
+        else:
+            sim_objects += arms
+
+    if cells:
+        # No robot can pick past the end of the last cell
+        wood.retire_fasteners_after(max(c.params.end_pos for c in cells))
 
     conveyor = CONVEYOR_MAPPING[type(config.conveyor)](
         params=config.conveyor, wood=wood, cells=cells, wood_stats=stats.wood
     )
 
-    runtime.register(*cells, wood, conveyor)
+    runtime.register(*sim_objects, wood, conveyor)
     return runtime, stats
@@ -2,5 +2,6 @@ from .base_wood_conveyor import BaseWoodConveyor
 from .dumb_wood_conveyor import DumbWoodConveyor
 from .greedy_busyness_wood_conveyor import GreedyBusynessWoodConveyor
 from .greedy_distance_wood_conveyor import GreedyDistanceWoodConveyor
+from .lookahead_wood_conveyor import LookaheadWoodConveyor
 
 __all__ = ["BaseWoodConveyor"]
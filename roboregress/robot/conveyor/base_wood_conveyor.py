@@ -7,10 +7,13 @@ import open3d as o3d
 from pydantic import BaseModel
 
 from roboregress.engine import BaseSimObject
+from roboregress.engine.base_simulation_object import LoopGenerator
 from roboregress.robot.cell import BaseRobotCell
 from roboregress.robot.statistics import WoodStats
 from roboregress.robot.vis_constants import ROBOT_WIDTH
-from roboregress.wood import Wood
+from roboregress.wood import Fastener, Wood
+
+from .utils.furthest_move import furthest_capable_cell_ends
 
 BaseParams = TypeVar("BaseParams", bound=BaseModel)
 
@@ -33,6 +36,31 @@ class BaseWoodConveyor(BaseSimObject, ABC, Generic[BaseParams]):
         self.wood = wood
         self.stats = wood_stats
 
+        self.capable_cell_ends: dict[Fastener, float] = furthest_capable_cell_ends(
+            cells
+        )
+        """The end of the furthest cell that can pick each fastener type"""
+
+    def _restarted_loop(self) -> LoopGenerator:
+        # Snapshots are taken while the wood moves, so finish timing the move
+        if self.stats.currently_working:
+            self.stats.stop_working()
+        yield from self._loop()
+
+    def get_state(self) -> dict[str, Any]:
+        """Get the timer of the wood's moves, for snapshots
+
+        :return: The state, as JSON-compatible values
+        """
+        return {"stats": self.stats.get_state()}
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        """Restore the timer of the wood's moves from a snapshot
+
+        :param state: The state, as returned by get_state
+        """
+        self.stats.set_state(state["stats"])
+
     def draw(self) -> list[o3d.geometry.Geometry]:
         box_1: o3d.geometry.TriangleMesh = o3d.geometry.TriangleMesh.create_box(
             width=0.1, height=0.1, depth=ROBOT_WIDTH * 2
@@ -35,7 +35,7 @@ class DumbWoodConveyor(BaseWoodConveyor["DumbWoodConveyor.Parameters"]):
             # Schedule work
             self.wood.schedule_move()
             while not self.wood.ready_for_move():
-                yield None
+                yield self.wood.work_released
 
             # Move the wood!
             self.wood.move(self.params.move_increment)
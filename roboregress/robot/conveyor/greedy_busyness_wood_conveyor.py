@@ -1,10 +1,14 @@
-from pydantic import BaseModel
+import numpy as np
+from pydantic import BaseModel, Field
 
 from roboregress.engine.base_simulation_object import LoopGenerator
 
-from ..cell import Rake
+from ..cell.base_rake import BaseRakeMixin
 from .base_wood_conveyor import BaseWoodConveyor
-from .utils.busyness import calculate_busyness_at_position
+from .utils.busyness import (
+    calculate_busyness_at_positions,
+    calculate_optimal_busyness_move,
+)
 from .utils.furthest_move import calculate_furthest_cell
 
 
@@ -18,7 +22,9 @@ class GreedyBusynessWoodConveyor(
         move_speed: float
         """How fast the wood moves, in meters/second"""
 
-        optimization_increment: float
+        optimization_increment: float | None = Field(...)
+        """The spacing of the candidate moves to search over. If None, the exact best
+        move is found instead of searching a grid of candidates."""
 
     def _loop(self) -> LoopGenerator:
         while True:
@@ -28,32 +34,47 @@ class GreedyBusynessWoodConveyor(
             if move_dist > 0:
                 self.wood.schedule_move()
                 while not self.wood.ready_for_move():
-                    yield None
+                    yield self.wood.work_released
 
                 self.wood.move(move_dist)
                 with self.stats.time():
                     yield move_dist / self.params.move_speed
             else:
-                yield None
+                # The best move can only change once fasteners are picked
+                yield self.wood.picked
 
     def _calculate_optimal_busyness_move(self) -> float:
-        furthest_move = calculate_furthest_cell(wood=self.wood, cells=self.cells)
-
-        best_increment = 0.0
-        best_busyness = 0
-        increment = 0.0
+        furthest_move = calculate_furthest_cell(
+            wood=self.wood,
+            cells=self.cells,
+            capable_cell_ends=self.capable_cell_ends,
+        )
 
         # Only run without rakes, since rakes may or may not be busy depending on
         # how much the wood moved previously
-        cells_without_rakes = [c for c in self.cells if not isinstance(c, Rake)]
-        while increment < furthest_move:
-            busyness = calculate_busyness_at_position(
-                move_distance=increment, wood=self.wood, cells=cells_without_rakes
+        cells_without_rakes = [
+            c for c in self.cells if not isinstance(c, BaseRakeMixin)
+        ]
+
+        if self.params.optimization_increment is None:
+            return calculate_optimal_busyness_move(
+                wood=self.wood, cells=cells_without_rakes, max_move=furthest_move
             )
-            if busyness > best_busyness:
-                best_busyness = busyness
-                best_increment = increment
+
+        # Evaluate every candidate on the grid at once
+        candidates = []
+        increment = 0.0
+        while increment < furthest_move:
+            candidates.append(increment)
             increment += self.params.optimization_increment
+        busyness = calculate_busyness_at_positions(
+            move_distances=candidates, wood=self.wood, cells=cells_without_rakes
+        )
+
+        # Take the smallest of the best moves, unless no move makes any cell busy
+        best_increment = 0.0
+        if len(candidates) and busyness.max() > 0:
+            best_increment = candidates[int(np.argmax(busyness))]
 
         assert best_increment < furthest_move
         assert best_increment >= 0
@@ -18,15 +18,21 @@ class GreedyDistanceWoodConveyor(
 
     def _loop(self) -> LoopGenerator:
         while True:
-            # Calculate the maximum amount the wood can be moved
-            while calculate_furthest_cell(wood=self.wood, cells=self.cells) == 0:
-                yield None
+            # Calculate the maximum amount the wood can be moved. It can only change
+            # once fasteners are picked.
+            while self._calculate_furthest_move() == 0:
+                yield self.wood.picked
 
             self.wood.schedule_move()
             while not self.wood.ready_for_move():
-                yield None
+                yield self.wood.work_released
 
-            move_increment = calculate_furthest_cell(wood=self.wood, cells=self.cells)
+            move_increment = self._calculate_furthest_move()
             self.wood.move(move_increment)
             with self.stats.time():
                 yield move_increment / self.params.move_speed
+
+    def _calculate_furthest_move(self) -> float:
+        return calculate_furthest_cell(
+            wood=self.wood, cells=self.cells, capable_cell_ends=self.capable_cell_ends
+        )
@@ -0,0 +1,57 @@
+from pydantic import BaseModel
+
+from roboregress.engine.base_simulation_object import LoopGenerator
+
+from ..cell.base_rake import BaseRakeMixin
+from .base_wood_conveyor import BaseWoodConveyor
+from .utils.lookahead import LookaheadPlanner
+
+
+class LookaheadWoodConveyor(BaseWoodConveyor["LookaheadWoodConveyor.Parameters"]):
+    """A conveyor that plans several moves ahead, using the expected time each cell
+    would take to pick the fasteners that each move brings into it. Only the first
+    move of the best plan is made, and then the plan is remade."""
+
+    class Parameters(BaseModel):
+        move_speed: float
+        """How fast the wood moves, in meters/second"""
+
+        lookahead_moves: int
+        """The most moves to plan ahead"""
+
+        candidate_moves: int = 4
+        """How many move distances to consider for each move of a plan"""
+
+        max_stages: int | None = 1000
+        """The most stages that planning a single move may model. Plans get shorter
+        when the budget runs out. If None, plans are never cut short."""
+
+    def _loop(self) -> LoopGenerator:
+        while True:
+            move_dist = self._plan_move()
+
+            if move_dist > 0:
+                self.wood.schedule_move()
+                while not self.wood.ready_for_move():
+                    yield self.wood.work_released
+
+                self.wood.move(move_dist)
+                with self.stats.time():
+                    yield move_dist / self.params.move_speed
+            else:
+                # The plan is to let the cells work, so replan once they've picked
+                yield self.wood.picked
+
+    def _plan_move(self) -> float:
+        # Rakes aren't modeled, since their work depends on how far the wood moved
+        planner = LookaheadPlanner(
+            wood=self.wood,
+            cells=[c for c in self.cells if not isinstance(c, BaseRakeMixin)],
+            capable_cell_ends=self.capable_cell_ends,
+            move_speed=self.params.move_speed,
+            candidate_moves=self.params.candidate_moves,
+        )
+        return planner.plan(
+            lookahead_moves=self.params.lookahead_moves,
+            max_stages=self.params.max_stages,
+        )
@@ -1,33 +1,156 @@
 from typing import Any
 
+import numpy as np
+import numpy.typing as npt
+
 from roboregress.robot.cell import BaseRobotCell
-from roboregress.wood import FASTENER_IDX, POSITION_IDX, SURFACE_IDX, Wood
+from roboregress.wood import Wood
 
 
 def calculate_busyness_at_position(
     wood: Wood, cells: list[BaseRobotCell[Any]], move_distance: float
 ) -> int:
     """Returns the number of robots that would be 'busy' if the wood were moved a
-    certain amount"""
-    # Move a copy of the wood to the estimated position
-    moved_fasteners = wood.fasteners
+    certain amount
+
+    :param wood: The wood to move
+    :param cells: The cells to consider the busyness of
+    :param move_distance: The distance to move the wood
+    :return: The number of busy cells
+    """
+    return int(
+        calculate_busyness_at_positions(
+            wood=wood, cells=cells, move_distances=np.array([move_distance])
+        )[0]
+    )
+
 
-    if moved_fasteners is None:
-        # There are no fasteners!
-        return 0
+def calculate_busyness_at_positions(
+    wood: Wood, cells: list[BaseRobotCell[Any]], move_distances: npt.ArrayLike
+) -> npt.NDArray[np.int64]:
+    """Returns the number of robots that would be 'busy' for each of several candidate
+    move distances, in one pass over the fasteners of each cell
 
-    moved_fasteners[:, POSITION_IDX] += move_distance
+    :param wood: The wood to move
+    :param cells: The cells to consider the busyness of
+    :param move_distances: A 1D array of candidate move distances
+    :return: The busyness for each candidate, in the same order
+    """
+    move_distances = np.asarray(move_distances, dtype=np.float64)
+    busyness = np.zeros(len(move_distances), dtype=np.int64)
+    if len(move_distances) == 0:
+        return busyness
 
-    cell_busyness: list[bool] = []
+    min_move, max_move = move_distances.min(), move_distances.max()
     for cell in cells:
-        busyness = 0
-        for pickable_type in cell.params.pick_probabilities:
-            of_type = moved_fasteners[:, FASTENER_IDX] == pickable_type
-            of_surface = moved_fasteners[:, SURFACE_IDX] == cell.params.pickable_surface
-            after_start = moved_fasteners[:, POSITION_IDX] > cell.params.start_pos
-            after_end = moved_fasteners[:, POSITION_IDX] < cell.params.end_pos
-            filtered = moved_fasteners[of_type & of_surface & after_end & after_start]
-            busyness += len(filtered)
-
-        cell_busyness.append(busyness > 0)
-    return sum(cell_busyness)
+        # Search only the part of the wood that could be moved into the cell
+        positions = wood.fastener_positions(
+            surface=cell.params.pickable_surface,
+            fastener_types=cell.params.pick_probabilities,
+            start_pos=cell.params.start_pos - max_move,
+            end_pos=cell.params.end_pos - min_move,
+        )
+        # A (candidates, fasteners) matrix of where each fastener would end up.
+        # Fasteners exactly on the end of the cell don't count as 'busy'
+        moved_positions = positions[np.newaxis, :] + move_distances[:, np.newaxis]
+        in_cell = (moved_positions > cell.params.start_pos) & (
+            moved_positions < cell.params.end_pos
+        )
+        busyness += np.any(in_cell, axis=1)
+    return busyness
+
+
+def _busy_intervals(
+    wood: Wood, cell: BaseRobotCell[Any], max_move: float
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Find the move distances that would make a cell 'busy'
+
+    A fastener at position p is strictly inside the cell after a move of d when
+    d is within the open interval (start_pos - p, end_pos - p). The cell is busy for
+    the union of these intervals, which is returned merged and sorted.
+
+    :param wood: The wood to move
+    :param cell: The cell to consider the busyness of
+    :param max_move: The longest move to consider
+    :return: The (starts, ends) of each merged open interval
+    """
+    width = cell.params.end_pos - cell.params.start_pos
+
+    # Only fasteners whose interval overlaps [0, max_move) matter
+    positions = wood.fastener_positions(
+        surface=cell.params.pickable_surface,
+        fastener_types=cell.params.pick_probabilities,
+        start_pos=cell.params.start_pos - max_move,
+        end_pos=cell.params.end_pos,
+    )
+    # Positions are ascending, so interval starts are ascending when reversed
+    starts = cell.params.start_pos - positions[::-1]
+    if len(starts) == 0:
+        return starts, starts
+
+    # Every interval is the same width, so an interval begins a new merged interval
+    # whenever it starts at or after the end of the interval before it. Intervals that
+    # only touch don't overlap, since they're open.
+    new_group = np.flatnonzero(np.diff(starts) >= width) + 1
+    group_starts = np.concatenate(([0], new_group))
+    group_ends = np.concatenate((new_group - 1, [len(starts) - 1]))
+    return starts[group_starts], starts[group_ends] + width
+
+
+def calculate_optimal_busyness_move(
+    wood: Wood, cells: list[BaseRobotCell[Any]], max_move: float
+) -> float:
+    """Find the move distance in [0, max_move) that makes the most robots 'busy'
+
+    Rather than searching a grid of candidate moves, this sweeps over the distances
+    where fasteners enter and leave each cell, so the result is exact. Busyness can
+    only change at those distances, so it's constant between consecutive ones.
+
+    If several moves are equally good, the smallest is preferred. Since busyness is
+    only constant over open intervals, the middle of the earliest best interval is
+    returned, which keeps clear of fasteners sitting right on the edge of a cell.
+
+    :param wood: The wood to move
+    :param cells: The cells to consider the busyness of
+    :param max_move: The exclusive upper bound of the move distance
+    :return: The best move distance, or 0 if not moving is as good as any move
+    """
+    if max_move <= 0:
+        return 0.0
+
+    interval_starts = []
+    interval_ends = []
+    for cell in cells:
+        starts, ends = _busy_intervals(wood=wood, cell=cell, max_move=max_move)
+        interval_starts.append(starts)
+        interval_ends.append(ends)
+    starts = np.concatenate(interval_starts)
+    ends = np.concatenate(interval_ends)
+    if len(starts) == 0:
+        return 0.0
+
+    # Sweep over every interval edge. On ties, process the ends first, since the
+    # intervals are open and don't include their edges.
+    edges = np.concatenate((starts, ends))
+    deltas = np.concatenate((np.ones(len(starts)), -np.ones(len(ends)))).astype(int)
+    order = np.lexsort((deltas, edges))
+    edges = edges[order]
+    busyness = np.cumsum(deltas[order])
+
+    # Busyness is constant over each segment between consecutive edges
+    segment_starts = np.maximum(edges[:-1], 0.0)
+    segment_ends = np.minimum(edges[1:], max_move)
+    segment_busyness = busyness[:-1]
+    valid = segment_starts < segment_ends
+    if not np.any(valid):
+        return 0.0
+    segment_busyness = np.where(valid, segment_busyness, -1)
+
+    # argmax returns the first, and so the smallest, of the best segments
+    best = int(np.argmax(segment_busyness))
+    if segment_busyness[best] <= 0:
+        return 0.0
+    if edges[best] < 0:
+        # Not moving at all is already one of the best options
+        return 0.0
+    return float((segment_starts[best] + segment_ends[best]) / 2)
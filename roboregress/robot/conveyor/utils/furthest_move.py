@@ -1,47 +1,74 @@
-from typing import Any, cast
-
-import numpy as np
+from typing import Any
 
 from roboregress.robot.cell import BaseRobotCell
 from roboregress.wood import Fastener, Wood
 
+MOVE_MARGIN = 1e-9
+"""How far (in meters) short of the end of a cell to move a fastener. Without this,
+rounding errors can leave a fastener that was moved to exactly the end of a cell just
+past it, out of reach of every robot."""
 
-def calculate_furthest_cell(wood: Wood, cells: list[BaseRobotCell[Any]]) -> float:
-    """Calculate the greediest possible furthest move the robot can make"""
-    fasteners = wood.fasteners
 
-    if fasteners is None:
-        raise ValueError("The wood must have fasteners for this algo to work!")
+def furthest_capable_cell_ends(
+    cells: list[BaseRobotCell[Any]],
+) -> dict[Fastener, float]:
+    """Find the end of the furthest cell that can pick each fastener type. This only
+    depends on the layout of the cells, so it can be computed once and reused.
 
-    # Track the furthest possible move for each fastener type
-    furthest_move_for_fastener = []
+    :param cells: The cells to consider
+    :return: The end position of the furthest capable cell, for each fastener type.
+        Types that no cell can pick are left out.
+    """
+    cell_ends: dict[Fastener, float] = {}
+    for robot in cells:
+        for fastener_type, pick_probability in robot.params.pick_probabilities.items():
+            if pick_probability <= 0:
+                # This robot can't pick this fastener
+                continue
+            cell_ends[fastener_type] = max(
+                robot.params.end_pos, cell_ends.get(fastener_type, -float("inf"))
+            )
+    return cell_ends
 
-    # Find the 'furthest cell' of each 'type' of cell
-    for fastener_type in Fastener:
-        fasteners_of_type = fasteners[fasteners[:, 2] == fastener_type]
 
-        if len(fasteners_of_type) == 0:
-            # If no fasteners of this type are present in the wood, at all
-            continue
+def calculate_furthest_cell(
+    wood: Wood,
+    cells: list[BaseRobotCell[Any]],
+    capable_cell_ends: dict[Fastener, float] | None = None,
+) -> float:
+    """Calculate the greediest possible furthest move the robot can make
 
-        highest_fastener = fasteners_of_type[np.argmax(fasteners_of_type[:, 0])][0]
+    :param wood: The wood to move
+    :param cells: The cells that pick from the wood
+    :param capable_cell_ends: The output of furthest_capable_cell_ends for the cells.
+        If not set, it's computed from the cells.
+    :return: The furthest move that keeps every fastener within reach of a cell that
+        can pick it. If there are no fasteners on the board, this is 0.
+    """
+    if capable_cell_ends is None:
+        capable_cell_ends = furthest_capable_cell_ends(cells)
 
-        furthest_move_for = -float("inf")
-        furthest_cell_for = -float("inf")
-        for robot in cells:
-            pick_probability = robot.params.pick_probabilities.get(fastener_type, 0)
-            if pick_probability <= 0:
-                # This robot can't pick this fastener
-                continue
-            delta = robot.params.end_pos - highest_fastener
-            if delta >= furthest_move_for and robot.params.end_pos >= furthest_cell_for:
-                furthest_move_for = delta
-                furthest_cell_for = robot.params.end_pos
+    # Retired fasteners are past every cell, so they would always be the highest of
+    # their type and out of reach of every cell. Skip those types, as if they were
+    # still on the board.
+    retired_types = {f for (_, f), count in wood.retired_fasteners.items() if count}
+
+    # Track the furthest possible move for each fastener type
+    furthest_move_for_fastener = []
+    for fastener_type, highest_fastener in wood.highest_fastener_positions().items():
+        if fastener_type in retired_types or fastener_type not in capable_cell_ends:
+            continue
 
+        furthest_move_for = capable_cell_ends[fastener_type] - highest_fastener
         if furthest_move_for >= 0:
+            # Fasteners within the margin of the cell end are as far as they can go
+            if furthest_move_for > 2 * MOVE_MARGIN:
+                furthest_move_for -= MOVE_MARGIN
+            else:
+                furthest_move_for = 0
             furthest_move_for_fastener.append(furthest_move_for)
 
     # Move the minimum furthest amount
     if len(furthest_move_for_fastener) == 0:
         return 0
-    return cast(float, np.min(furthest_move_for_fastener))
+    return min(furthest_move_for_fastener)
@@ -0,0 +1,211 @@
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from roboregress.robot.cell import BaseRobotCell
+from roboregress.wood import Fastener, Wood
+from roboregress.wood.fastener_store import FASTENER_CODES, FASTENERS, SURFACE_CODES
+
+from .furthest_move import MOVE_MARGIN
+
+
+class LookaheadPlanner:
+    """Plans a sequence of moves of the wood, to maximize the modeled throughput.
+
+    The planner models each move as a 'stage': the wood moves, and then every cell
+    picks all the fasteners in its workspace before the next move. Each cell takes
+    its expected_work_seconds for that, and the stage lasts as long as the busiest
+    cell. Like calculate_furthest_cell, no move may push a fastener past the last
+    cell that can pick it.
+
+    Rakes are left out of the model, since their work depends on how far the wood
+    moved rather than on the fasteners in their workspace.
+    """
+
+    def __init__(
+        self,
+        wood: Wood,
+        cells: list[BaseRobotCell[Any]],
+        capable_cell_ends: dict[Fastener, float],
+        move_speed: float,
+        candidate_moves: int,
+    ):
+        """
+        :param wood: The wood to plan moves for
+        :param cells: The cells to model. Rakes should already be filtered out.
+        :param capable_cell_ends: The output of furthest_capable_cell_ends
+        :param move_speed: How fast the wood moves, in meters/second
+        :param candidate_moves: How many move distances to consider at each stage
+        """
+        self._positions, surfaces, types = wood.fastener_columns()
+        self._move_speed = move_speed
+        self._candidate_moves = candidate_moves
+
+        # Fastener types with retired fasteners are skipped, as they would be out of
+        # reach of every cell (see calculate_furthest_cell)
+        retired_types = {f for (_, f), count in wood.retired_fasteners.items() if count}
+        self._type_limits = [
+            (types == FASTENER_CODES[fastener_type], cell_end)
+            for fastener_type, cell_end in capable_cell_ends.items()
+            if fastener_type not in retired_types
+        ]
+
+        # Model the cells as arrays, so every cell is modeled in one vectorized pass
+        self._cell_starts = np.array([[c.params.start_pos] for c in cells])
+        self._cell_ends = np.array([[c.params.end_pos] for c in cells])
+        self._work_seconds = np.zeros((len(cells), len(self._positions)))
+        """The expected seconds for each cell to pick each fastener on the board, if it
+        were in the cell. Zero for fasteners the cell can't pick."""
+        for i, cell in enumerate(cells):
+            seconds_by_type = np.zeros(len(FASTENERS))
+            for fastener_type in cell.params.pick_probabilities:
+                seconds_by_type[FASTENER_CODES[fastener_type]] = (
+                    cell.expected_work_seconds([fastener_type])
+                )
+            on_surface = surfaces == SURFACE_CODES[cell.params.pickable_surface]
+            self._work_seconds[i] = np.where(on_surface, seconds_by_type[types], 0)
+        self._pickable = self._work_seconds > 0
+
+        self.n_stages = 0
+        """How many stages the searches so far have modeled"""
+        self._max_stages: int | None = None
+        """The number of modeled stages at which to abort the current search"""
+
+    def plan(self, lookahead_moves: int, max_stages: int | None) -> float:
+        """Find the first move of the best plan of up to lookahead_moves moves.
+
+        Plans are searched with iterative deepening: all plans of one move, then of two
+        moves, and so on. If the stage budget runs out, the best plan of the deepest
+        fully searched length is used. Plans of one move are always searched.
+
+        The budget counts modeled stages rather than wall-clock time, so the plan is
+        the same no matter how fast the machine running the simulation is.
+
+        :param lookahead_moves: The most moves to plan ahead
+        :param max_stages: The most stages the search may model, over every length
+            of plan searched. If None, the search always plans lookahead_moves ahead.
+        :return: The distance to move the wood now. Zero means the plan is to wait for
+            the cells to pick the fasteners already in their workspaces.
+        """
+        alive = np.ones(len(self._positions), dtype=np.bool_)
+        best_move = 0.0
+        self.n_stages = 0
+        for depth in range(1, lookahead_moves + 1):
+            self._max_stages = max_stages if depth > 1 else None
+            try:
+                _, best_move = self._search_root(alive, depth)
+            except _BudgetExceeded:
+                break
+        return best_move
+
+    def _search_root(
+        self, alive: npt.NDArray[np.bool_], depth: int
+    ) -> tuple[float, float]:
+        """Search all plans of a given number of moves
+
+        :param alive: Which fasteners are on the board
+        :param depth: How many moves to plan
+        :return: The best (throughput, first move) found
+        """
+        best_throughput, best_move = -1.0, 0.0
+
+        # Waiting lets the cells clear their workspaces before the wood moves. This is
+        # only an option when some cell has work to do, or nothing would ever change.
+        wait_alive, wait_seconds = self._stage(alive, 0.0)
+        if wait_seconds > 0:
+            best_throughput = self._search(wait_alive, 0.0, depth, 0.0, wait_seconds)
+
+        for move in self._candidates(alive, 0.0):
+            moved_alive, work_seconds = self._stage(alive, move)
+            throughput = self._search(
+                moved_alive,
+                move,
+                depth - 1,
+                move,
+                move / self._move_speed + work_seconds,
+            )
+            if throughput > best_throughput:
+                best_throughput, best_move = throughput, move
+        return best_throughput, best_move
+
+    def _search(
+        self,
+        alive: npt.NDArray[np.bool_],
+        offset: float,
+        depth: int,
+        distance: float,
+        seconds: float,
+    ) -> float:
+        """Find the best throughput of any plan continuing from a modeled state
+
+        :param alive: Which fasteners haven't been picked yet in this plan
+        :param offset: How far the wood has moved so far in this plan
+        :param depth: How many more moves to plan
+        :param distance: The distance moved so far in this plan
+        :param seconds: The seconds spent so far in this plan
+        :return: The best modeled throughput, in meters/second
+        """
+        best_throughput = distance / seconds if seconds > 0 else 0.0
+        if depth == 0:
+            return best_throughput
+
+        for move in self._candidates(alive, offset):
+            moved_alive, work_seconds = self._stage(alive, offset + move)
+            throughput = self._search(
+                moved_alive,
+                offset + move,
+                depth - 1,
+                distance + move,
+                seconds + move / self._move_speed + work_seconds,
+            )
+            best_throughput = max(best_throughput, throughput)
+        return best_throughput
+
+    def _candidates(
+        self, alive: npt.NDArray[np.bool_], offset: float
+    ) -> npt.NDArray[np.float64]:
+        """Spread candidate moves evenly up to the furthest allowed move"""
+        furthest_moves = []
+        for of_type, cell_end in self._type_limits:
+            positions = self._positions[alive & of_type]
+            if len(positions) == 0:
+                continue
+            furthest_move = cell_end - (positions[-1] + offset)
+            if furthest_move >= 0:
+                furthest_moves.append(furthest_move - MOVE_MARGIN)
+
+        if len(furthest_moves) == 0 or min(furthest_moves) <= MOVE_MARGIN:
+            return np.empty(0)
+        furthest_move = min(furthest_moves)
+        return np.linspace(0, furthest_move, self._candidate_moves + 1)[1:]
+
+    def _stage(
+        self, alive: npt.NDArray[np.bool_], offset: float
+    ) -> tuple[npt.NDArray[np.bool_], float]:
+        """Model the cells picking every fastener in their workspace, with the wood
+        moved by the given offset
+
+        :param alive: Which fasteners haven't been picked yet in this plan
+        :param offset: How far the wood has moved so far in this plan
+        :raises _BudgetExceeded: If the stage budget of the search has run out
+        :return: Which fasteners are left afterwards, and how long the busiest cell
+            spent picking
+        """
+        if self._max_stages is not None and self.n_stages >= self._max_stages:
+            raise _BudgetExceeded
+        self.n_stages += 1
+
+        positions = self._positions + offset
+        in_cell = (
+            alive
+            & self._pickable
+            & (positions > self._cell_starts)
+            & (positions <= self._cell_ends)
+        )
+        work_seconds = np.sum(self._work_seconds, axis=1, where=in_cell)
+        return alive & ~in_cell.any(axis=0), float(work_seconds.max(initial=0))
+
+
+class _BudgetExceeded(Exception):
+    """Raised to abort a search once the stage budget has run out"""
@@ -7,7 +7,8 @@ from bokeh.models import ColumnDataSource, Div
 from bokeh.models.widgets import DataTable, TableColumn
 from pydantic import BaseModel, Field
 
-from roboregress.robot.statistics import StatsTracker
+from roboregress.engine import BatchMeansStoppingRule, RuntimeProfile
+from roboregress.robot.statistics import FEET_PER_METER, StatsTracker
 
 _CODE_BLOCK_STYLE = {
     "font-family": "Monaco, monospace",
@@ -39,9 +40,47 @@ class HighLevelTable(BaseModel):
     processed_feet: list[float] = Field(default_factory=list)
 
 
-def render_stats(stats: StatsTracker, save_to: Path, config_file: Path) -> None:
-    """Generate and open a report in browser"""
-
+class SteadyStateTable(BaseModel):
+    stop_reason: list[str] = Field(default_factory=list)
+    steady_state_throughput_feet_per_8_hrs: list[float] = Field(default_factory=list)
+    confidence_half_width_feet_per_8_hrs: list[float] = Field(default_factory=list)
+    confidence_level: list[float] = Field(default_factory=list)
+    warmup_seconds: list[float] = Field(default_factory=list)
+
+
+class ObjectProfileTable(BaseModel):
+    object_id: list[int] = Field(default_factory=list)
+    object_type: list[str] = Field(default_factory=list)
+    n_steps: list[int] = Field(default_factory=list)
+    n_no_progress: list[int] = Field(default_factory=list)
+    n_sleeps: list[int] = Field(default_factory=list)
+    n_event_waits: list[int] = Field(default_factory=list)
+    wall_seconds: list[float] = Field(default_factory=list)
+    wall_time_ratio: list[float] = Field(default_factory=list)
+
+
+class EngineProfileTable(BaseModel):
+    steps_per_wall_second: list[float] = Field(default_factory=list)
+    object_steps_per_wall_second: list[float] = Field(default_factory=list)
+    event_resumes_per_wall_second: list[float] = Field(default_factory=list)
+    simulated_seconds_per_wall_second: list[float] = Field(default_factory=list)
+    engine_wall_time_ratio: list[float] = Field(default_factory=list)
+
+
+def render_stats(
+    stats: StatsTracker,
+    save_to: Path,
+    config_file: Path,
+    profile: RuntimeProfile | None = None,
+) -> None:
+    """Generate and open a report in browser
+
+    :param stats: The statistics of the simulation
+    :param save_to: Where to save the report
+    :param config_file: The configuration the simulation was created from
+    :param profile: If set, the report includes where the wall time of the
+        simulation went
+    """
     # Gather the per-robot statistics
     robot_table = RobotTable()
     for cell_id, rob_stat in stats.robots_by_cell:
@@ -77,18 +116,85 @@ def render_stats(stats: StatsTracker, save_to: Path, config_file: Path) -> None:
     robot_table_plot = render_pydantic_table(robot_table)
     overall_table_plot = render_pydantic_table(overall_table)
     missed_fasteners_plot = render_dict_table(stats.missed_fasteners)
+    summary_plots = [overall_table_plot, missed_fasteners_plot]
+    if stats.stopping_rule is not None:
+        steady_state_table = _steady_state_table(stats.stopping_rule)
+        summary_plots.append(render_pydantic_table(steady_state_table))
     input_yaml = Div(
         text=config_file.read_text(), render_as_text=False, style=_CODE_BLOCK_STYLE
     )
 
+    rows = [[robot_table_plot, summary_plots]]
+    if profile is not None:
+        rows.append(_profile_tables(profile))
     final = layout(
-        [[robot_table_plot, [overall_table_plot, missed_fasteners_plot]], [input_yaml]],
+        [*rows, [input_yaml]],
         sizing_mode="stretch_both",
     )
     curdoc().theme = "dark_minimal"
     show(final)
 
 
+def _steady_state_table(rule: BatchMeansStoppingRule) -> SteadyStateTable:
+    """Describe the steady state found by a stopping rule watching throughput"""
+    meters_to_daily_feet = FEET_PER_METER * 60 * 60 * 8
+    table = SteadyStateTable()
+    table.stop_reason.append("converged" if rule.converged else "time limit")
+    table.confidence_level.append(rule.confidence)
+    table.warmup_seconds.append(round(rule.warmup_seconds))
+    if rule.rate is not None and rule.half_width is not None:
+        table.steady_state_throughput_feet_per_8_hrs.append(
+            round(rule.rate * meters_to_daily_feet)
+        )
+        table.confidence_half_width_feet_per_8_hrs.append(
+            round(rule.half_width * meters_to_daily_feet)
+        )
+    else:
+        # Too few batches passed the warm-up to build an interval
+        table.steady_state_throughput_feet_per_8_hrs.append(float("nan"))
+        table.confidence_half_width_feet_per_8_hrs.append(float("nan"))
+    return table
+
+
+def _profile_tables(profile: RuntimeProfile) -> list[DataTable]:
+    """Render where the wall time of the simulation went, per object and overall"""
+    object_table = ObjectProfileTable()
+    for object_id, object_profile in enumerate(profile.objects):
+        object_table.object_id.append(object_id)
+        object_table.object_type.append(object_profile.name)
+        object_table.n_steps.append(object_profile.n_steps)
+        object_table.n_no_progress.append(object_profile.n_no_progress)
+        object_table.n_sleeps.append(object_profile.n_sleeps)
+        object_table.n_event_waits.append(object_profile.n_event_waits)
+        object_table.wall_seconds.append(round(object_profile.wall_seconds, 3))
+        object_table.wall_time_ratio.append(
+            round(object_profile.wall_seconds / profile.wall_seconds * 100, 1)
+            if profile.wall_seconds
+            else 0
+        )
+
+    engine_table = EngineProfileTable()
+    engine_table.steps_per_wall_second.append(round(profile.steps_per_wall_second))
+    engine_table.object_steps_per_wall_second.append(
+        round(profile.object_steps_per_wall_second)
+    )
+    engine_table.event_resumes_per_wall_second.append(
+        round(profile.event_resumes_per_wall_second)
+    )
+    engine_table.simulated_seconds_per_wall_second.append(
+        round(profile.simulated_seconds_per_wall_second)
+    )
+    engine_table.engine_wall_time_ratio.append(
+        round(profile.engine_wall_seconds / profile.wall_seconds * 100, 1)
+        if profile.wall_seconds
+        else 0
+    )
+    return [
+        render_pydantic_table(object_table),
+        render_pydantic_table(engine_table),
+    ]
+
+
 def render_dict_table(data: Mapping[str, int | list[int]]) -> DataTable:
     # Accept single values as well as lists of values
     data = {
@@ -0,0 +1,117 @@
+"""An on-disk cache of simulation results, so unchanged runs aren't simulated twice.
+
+Results are keyed on a hash of everything that decides them: the fully resolved
+configuration, the seed, the simulated time, the snapshot the run resumed from, the
+package version and the source code of the package. Any change to those gives a new
+key, so entries never need to be invalidated. Editing the simulation abandons every
+earlier entry, even without a version bump.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import roboregress
+from roboregress.robot.configuration import SimConfig, config_to_dict, resolve_layout
+from roboregress.robot.snapshot import Snapshot
+
+DEFAULT_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "roboregress"
+)
+"""Where results are cached, unless another directory is chosen"""
+
+
+def cache_key(
+    config: SimConfig,
+    seed: int,
+    time: float,
+    stop_tolerance: float | None = None,
+    resumed_from: Snapshot | None = None,
+) -> str:
+    """Hash everything that decides the result of a simulation
+
+    :param config: The configuration to simulate. Pickers that will be placed
+        automatically hash the same as pickers placed explicitly at those positions.
+    :param seed: The seed of the simulation
+    :param time: How long the simulation runs for, in seconds
+    :param stop_tolerance: The tolerance of the steady-state stopping rule, if any
+    :param resumed_from: The snapshot the simulation resumes or forks from, if any.
+        Its whole state is hashed, since a snapshot saved by a fork has a different
+        history than one of a fresh run with the same configuration.
+    :return: The key of the result
+    """
+    config = resolve_layout(config)
+    identity = {
+        "version": roboregress.__version__,
+        "source": source_hash(),
+        "seed": seed,
+        "time": float(time),
+        "stop_tolerance": stop_tolerance,
+        "resumed_from": (
+            None if resumed_from is None else _hash_json(resumed_from.to_dict())
+        ),
+        # The parameters alone don't say which cell or conveyor they configure
+        "conveyor_type": type(config.conveyor).__name__,
+        "picker_types": [type(params).__name__ for params in config.pickers],
+        "config": config_to_dict(config),
+    }
+    return _hash_json(identity)
+
+
+def _hash_json(value: Any) -> str:
+    encoded = json.dumps(value, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+@functools.cache
+def source_hash() -> str:
+    """Hash the source code of the package, which decides how every run is simulated
+
+    :return: The hash of every module of the package
+    """
+    package = Path(roboregress.__file__).parent
+    digest = hashlib.sha256()
+    for module in sorted(package.rglob("*.py")):
+        digest.update(module.relative_to(package).as_posix().encode())
+        digest.update(module.read_bytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR):
+        self.directory = directory
+
+    def get(self, key: str) -> dict[str, float] | None:
+        """Get a cached result
+
+        :param key: The key of the result, from cache_key
+        :return: The summary stored under the key, or None if there is none
+        """
+        try:
+            with self._path(key).open() as f:
+                summary: dict[str, float] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return summary
+
+    def put(self, key: str, summary: dict[str, float]) -> None:
+        """Store a result, replacing any result already stored under the key
+
+        :param key: The key of the result, from cache_key
+        :param summary: The summary of the result, from StatsTracker.summary
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first, so parallel runs never read half a result
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.directory, suffix=".tmp", delete=False
+        ) as f:
+            json.dump(summary, f)
+        Path(f.name).replace(self._path(key))
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
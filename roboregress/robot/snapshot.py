@@ -0,0 +1,172 @@
+"""Snapshots of a running simulation, for checkpointing long runs and resuming them.
+
+A snapshot records the state of the runtime and of every sim object: the fasteners on
+the board, the state of every random generator, the counters and timers of the
+statistics, and which objects are sleeping until when. Restoring a snapshot sets that
+state directly, so it costs the same no matter how long the simulation ran for.
+
+Sim objects run as generators, which can't be serialized. So snapshots are only taken
+while the wood moves, which is when every loop can start over from the top: no cell is
+picking, and every object is either waiting for the move to end or about to carry on.
+
+Since the state doesn't depend on the configuration that created it, a snapshot can be
+restored with changed conveyor or cell parameters, to fork a simulation after its
+warm-up. The fork must have the same sim objects, so it must keep the same pickers.
+
+The batches measured by the throughput stopping rule are saved too, so a resumed run
+stops when the uninterrupted run would have. A fork measures a different simulation
+from the one the batches were measured on, so its stopping rule starts over.
+"""
+
+import json
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+import roboregress
+from roboregress.engine import SimulationRuntime
+from roboregress.robot.configuration import (
+    SimConfig,
+    config_to_dict,
+    runtime_from_config,
+)
+from roboregress.robot.statistics import StatsTracker
+
+
+class Snapshot(BaseModel):
+    config: SimConfig
+    """The configuration the simulation was created from"""
+
+    seed: int | None
+    """The seed the simulation was created with"""
+
+    timestamp: float
+    """The timestamp of the runtime"""
+
+    state: dict[str, Any]
+    """The state of the runtime and every sim object, as from
+    SimulationRuntime.get_state"""
+
+    stopping_rule: dict[str, Any] | None = None
+    """The state of the throughput stopping rule, as from
+    BatchMeansStoppingRule.get_state, if the simulation had one"""
+
+    version: str = roboregress.__version__
+    """The package version the snapshot was taken with"""
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the snapshot to JSON-compatible values, as it's saved
+
+        :return: The snapshot as a dict of JSON-compatible values
+        """
+        return {**self.dict(), "config": config_to_dict(self.config)}
+
+    def save(self, file: Path) -> None:
+        """Save the snapshot, replacing the file atomically so a run that is
+        interrupted while saving leaves the previous snapshot intact
+
+        :param file: The file to save the snapshot to
+        """
+        with tempfile.NamedTemporaryFile(
+            "w", dir=file.parent, suffix=".tmp", delete=False
+        ) as f:
+            json.dump(self.to_dict(), f)
+        Path(f.name).replace(file)
+
+    @classmethod
+    def load(cls, file: Path) -> "Snapshot":
+        with file.open() as f:
+            return cls.parse_obj(json.load(f))
+
+
+def step_to_snapshot_point(
+    runtime: SimulationRuntime, stats: StatsTracker, timestamp: float
+) -> bool:
+    """Step the runtime until a snapshot can be taken, which is while the wood moves.
+    The stopping rule of the stats tracker, if any, is updated at every step.
+
+    :param runtime: The runtime, created by runtime_from_config
+    :param stats: The stats tracker of the runtime
+    :param timestamp: Stop stepping once the runtime reaches this timestamp
+    :return: True if a snapshot can be taken, or False if the runtime reached the
+        timestamp or its stopping rule was satisfied first
+    """
+    rule = stats.stopping_rule
+    while not stats.wood.currently_working:
+        if runtime.timestamp >= timestamp or (rule is not None and rule.converged):
+            return False
+        runtime.step()
+        if rule is not None:
+            rule.update(runtime.timestamp)
+    return True
+
+
+def take_snapshot(
+    runtime: SimulationRuntime,
+    stats: StatsTracker,
+    config: SimConfig,
+    seed: int | None,
+) -> Snapshot:
+    """Take a snapshot of a runtime
+
+    :param runtime: The runtime, created by runtime_from_config
+    :param stats: The stats tracker of the runtime
+    :param config: The configuration the runtime was created from
+    :param seed: The seed the runtime was created with
+    :raises ValueError: If the wood isn't moving. See step_to_snapshot_point.
+    :return: The snapshot
+    """
+    if not stats.wood.currently_working:
+        raise ValueError("Snapshots can only be taken while the wood is moving!")
+    return Snapshot(
+        config=config,
+        seed=seed,
+        timestamp=runtime.timestamp,
+        state=runtime.get_state(),
+        stopping_rule=(
+            stats.stopping_rule.get_state() if stats.stopping_rule is not None else None
+        ),
+    )
+
+
+def restore_snapshot(
+    snapshot: Snapshot,
+    config: SimConfig | None = None,
+    stop_tolerance: float | None = None,
+) -> tuple[SimulationRuntime, StatsTracker]:
+    """Recreate the runtime a snapshot was taken of
+
+    :param snapshot: The snapshot to restore
+    :param config: If set, the simulation carries on with this configuration instead
+        of the one the snapshot was taken with. It must have the same pickers, but
+        their parameters and those of the conveyor may differ.
+    :param stop_tolerance: If set, the stats tracker watches the throughput with this
+        tolerance. Unless the simulation is forked, the rule carries on from the
+        batches in the snapshot.
+    :raises ValueError: If the configuration creates different sim objects than the
+        snapshot was taken of
+    :return: The runtime, and the stats tracker of the simulation
+    """
+    if snapshot.version != roboregress.__version__:
+        logging.warning(
+            f"Restoring a snapshot taken with version {snapshot.version} on version "
+            f"{roboregress.__version__}. Its state may not match this version."
+        )
+
+    config = config if config is not None else snapshot.config
+    runtime, stats = runtime_from_config(config, seed=snapshot.seed)
+    try:
+        runtime.set_state(snapshot.state)
+    except ValueError as e:
+        raise ValueError(
+            "The configuration doesn't match the simulation of the snapshot"
+        ) from e
+
+    if stop_tolerance is not None:
+        rule = stats.watch_throughput(stop_tolerance)
+        if snapshot.stopping_rule is not None and config == snapshot.config:
+            rule.set_state(snapshot.stopping_rule)
+    return runtime, stats
@@ -2,12 +2,12 @@ import contextlib
 from collections.abc import Generator
 from typing import Any
 
-from roboregress.engine import SimulationRuntime
-from roboregress.wood import Surface, Wood
+from roboregress.engine import BatchMeansStoppingRule, SimulationRuntime
+from roboregress.wood import QueryCache, Surface, Wood
 
 from .cell import BaseRobotCell
 
-_FEET_PER_METER = 3.280839895
+FEET_PER_METER = 3.280839895
 
 
 class WorkTimeTracker:
@@ -38,13 +38,12 @@ class WorkTimeTracker:
         """A context manager for tracking utilization of a robot"""
 
         self.start_working()
-        self.currently_working = True
         yield
         self.stop_working()
-        self.currently_working = False
 
     def start_working(self) -> None:
         time = self._runtime.timestamp
+        self.currently_working = True
 
         if self._last_work_end is not None:
             slack_time = time - self._last_work_end
@@ -58,10 +57,35 @@ class WorkTimeTracker:
 
         assert self._last_work_start is not None
         assert time > self._last_work_start
+        self.currently_working = False
         self._last_work_end = time
         work_time = time - self._last_work_start
         self.total_time_working += work_time
 
+    def get_state(self) -> dict[str, Any]:
+        """Get the totals of the tracker, and whether it's timing work, for snapshots
+
+        :return: The state, as JSON-compatible values
+        """
+        return {
+            "total_time_working": self.total_time_working,
+            "total_time_slacking": self.total_time_slacking,
+            "currently_working": self.currently_working,
+            "last_work_start": self._last_work_start,
+            "last_work_end": self._last_work_end,
+        }
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        """Restore the tracker from a snapshot. See get_state.
+
+        :param state: The state, as returned by get_state
+        """
+        self.total_time_working = state["total_time_working"]
+        self.total_time_slacking = state["total_time_slacking"]
+        self.currently_working = state["currently_working"]
+        self._last_work_start = state["last_work_start"]
+        self._last_work_end = state["last_work_end"]
+
 
 class RobotStats:
     def __init__(
@@ -77,6 +101,26 @@ class RobotStats:
         self.work_timer = WorkTimeTracker(runtime=runtime)
         self.waiting_for_wood_timer = WorkTimeTracker(runtime=runtime)
 
+    def get_state(self) -> dict[str, Any]:
+        """Get the counters and timers of the robot, for snapshots
+
+        :return: The state, as JSON-compatible values
+        """
+        return {
+            "n_picked_fasteners": self.n_picked_fasteners,
+            "work_timer": self.work_timer.get_state(),
+            "waiting_for_wood_timer": self.waiting_for_wood_timer.get_state(),
+        }
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        """Restore the counters and timers of the robot from a snapshot
+
+        :param state: The state, as returned by get_state
+        """
+        self.n_picked_fasteners = state["n_picked_fasteners"]
+        self.work_timer.set_state(state["work_timer"])
+        self.waiting_for_wood_timer.set_state(state["waiting_for_wood_timer"])
+
 
 class WoodStats(WorkTimeTracker):
     def __init__(self, wood: Wood, runtime: SimulationRuntime):
@@ -91,9 +135,13 @@ class WoodStats(WorkTimeTracker):
     def total_meters_processed(self) -> float:
         return self._wood.processed_board
 
+    @property
+    def query_cache(self) -> QueryCache:
+        return self._wood.query_cache
+
     @property
     def total_feet_processed(self) -> float:
-        return self._wood.processed_board * _FEET_PER_METER
+        return self._wood.processed_board * FEET_PER_METER
 
     @property
     def throughput_meters(self) -> float:
@@ -103,13 +151,15 @@ class WoodStats(WorkTimeTracker):
 
     @property
     def throughput_feet(self) -> float:
-        return self.throughput_meters * _FEET_PER_METER
+        return self.throughput_meters * FEET_PER_METER
 
 
 class StatsTracker:
     def __init__(self, runtime: SimulationRuntime, wood: Wood) -> None:
         self.robot_stats: set[RobotStats] = set()
         self.wood = WoodStats(wood=wood, runtime=runtime)
+        self.stopping_rule: BatchMeansStoppingRule | None = None
+        """The rule watching the throughput for a steady state, if there is one"""
         self._runtime = runtime
 
     @property
@@ -147,6 +197,37 @@ class StatsTracker:
     def total_time(self) -> float:
         return self._runtime.timestamp
 
+    def watch_throughput(self, tolerance: float) -> BatchMeansStoppingRule:
+        """Create a rule that stops the simulation once the steady-state throughput
+        is known to within a tolerance. The summary and report include its result.
+
+        :param tolerance: The half-width of the confidence interval to stop at, as a
+            fraction of the throughput
+        :return: The rule, to pass to SimulationRuntime.step_until
+        """
+        self.stopping_rule = BatchMeansStoppingRule(
+            measure=lambda: self.wood.total_meters_processed, tolerance=tolerance
+        )
+        return self.stopping_rule
+
+    def summary(self) -> dict[str, float]:
+        """The headline statistics of the simulation, for comparing many runs"""
+        summary = {
+            "total_time": self.total_time,
+            "processed_meters": self.wood.total_meters_processed,
+            "throughput_meters": self.wood.throughput_meters,
+            "throughput_feet_per_8_hrs": self.wood.throughput_feet * 60 * 60 * 8,
+            "total_picked_fasteners": self.wood.total_picked_fasteners,
+            "missed_fasteners": sum(self.missed_fasteners.values()),
+        }
+        rule = self.stopping_rule
+        if rule is not None and rule.rate is not None and rule.half_width is not None:
+            summary["steady_state_throughput_meters"] = rule.rate
+            summary["steady_state_half_width_meters"] = rule.half_width
+            summary["warmup_seconds"] = rule.warmup_seconds
+            summary["converged"] = rule.converged
+        return summary
+
     def create_robot_stats_tracker(self, robot: BaseRobotCell[Any]) -> RobotStats:
         def _get_key(stats: RobotStats) -> tuple[float, float, Surface]:
             """Create a unique identifier"""
@@ -0,0 +1,204 @@
+import itertools
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import yaml
+from pydantic import BaseModel, Field, validator
+
+from roboregress.engine import DEFAULT_SEED
+from roboregress.robot.configuration import SimConfig, runtime_from_config
+from roboregress.robot.result_cache import ResultCache, cache_key
+
+SEED_AXIS = "seed"
+"""The axis that sets the seed of each run, instead of a configuration value"""
+
+N_CELLS_KEY = "n_cells"
+"""Setting this key on a picker, such as `pickers.1.n_cells`, repeats that picker"""
+
+RESULT_COLUMNS = (
+    "total_time",
+    "processed_meters",
+    "throughput_meters",
+    "throughput_feet_per_8_hrs",
+    "total_picked_fasteners",
+    "missed_fasteners",
+    "steady_state_throughput_meters",
+    "steady_state_half_width_meters",
+    "warmup_seconds",
+    "converged",
+    "wall_seconds",
+    "cached",
+)
+"""The columns of each result row, after the run index and the axes"""
+
+
+class SweepConfig(BaseModel):
+    base_config: Path
+    """The configuration to vary. Relative paths are relative to the sweep file."""
+
+    time: float = 8 * 60 * 60
+    """How long to run each simulation for, in seconds"""
+
+    stop_tolerance: float | None = None
+    """If set, each simulation stops before `time` once its steady-state throughput
+    is known to within this fraction, at 95% confidence"""
+
+    axes: dict[str, list[Any]] = Field(default_factory=dict)
+    """The values to sweep over, keyed by the path of the value in the base
+    configuration. Paths are dotted, like `conveyor.move_speed`, and index into lists
+    with numbers, like `pickers.1.big_bird_pick_seconds`. A `*` applies to every list
+    item with the key, like `pickers.*.big_bird_pick_seconds`.
+
+    Two keys are special: `seed` sets the seed of the run, and `pickers.<i>.n_cells`
+    repeats a picker that many times. Every combination of values is run."""
+
+    @validator("axes")
+    @classmethod
+    def _check_axis_paths(cls, axes: dict[str, list[Any]]) -> dict[str, list[Any]]:
+        for axis in axes:
+            *parents, key = axis.split(".")
+            if "*" in parents[:-1] or key == "*":
+                raise ValueError(f"{axis}: a `*` must come right before the last key")
+            if key == N_CELLS_KEY and not (len(parents) >= 2 and parents[-1].isdigit()):
+                raise ValueError(
+                    f"{axis}: `{N_CELLS_KEY}` repeats a single picker, so it must "
+                    f"follow the index of that picker, like `pickers.1.{N_CELLS_KEY}`"
+                )
+        return axes
+
+
+class SweepRun(BaseModel):
+    index: int
+    """The position of the run in the grid"""
+
+    axis_values: dict[str, Any]
+    """The value of each axis for this run"""
+
+    config: SimConfig
+    seed: int
+    time: float
+    stop_tolerance: float | None = None
+
+
+def load_sweep(file: Path) -> SweepConfig:
+    with file.open() as f:
+        sweep = SweepConfig.parse_obj(yaml.safe_load(f))
+    sweep.base_config = file.parent / sweep.base_config
+    return sweep
+
+
+def expand_sweep(sweep: SweepConfig) -> Iterator[SweepRun]:
+    """Expand the grid of a sweep into the configuration of each run. Axes that
+    don't match any value of the base configuration raise a KeyError.
+
+    :param sweep: The sweep to expand
+    :yields: Each run, in the order of the grid
+    """
+    with sweep.base_config.open() as f:
+        base = yaml.safe_load(f)
+
+    # Values set before repeating pickers see the original picker indices, and
+    # pickers are repeated from the end so earlier indices stay valid
+    paths = {axis: axis.split(".") for axis in sweep.axes if axis != SEED_AXIS}
+    ordered_axes = sorted(
+        paths,
+        key=lambda axis: (
+            paths[axis][-1] == N_CELLS_KEY,
+            -int(paths[axis][1]) if paths[axis][-1] == N_CELLS_KEY else 0,
+        ),
+    )
+
+    for index, combination in enumerate(itertools.product(*sweep.axes.values())):
+        values = dict(zip(sweep.axes, combination, strict=True))
+
+        # Round trip through JSON, so values shared through YAML anchors are copied
+        config = json.loads(json.dumps(base))
+        for axis in ordered_axes:
+            _set_value(config, paths[axis], values[axis])
+
+        yield SweepRun(
+            index=index,
+            axis_values=values,
+            config=SimConfig.parse_obj(config),
+            seed=values.get(SEED_AXIS, DEFAULT_SEED),
+            time=sweep.time,
+            stop_tolerance=sweep.stop_tolerance,
+        )
+
+
+def run_sweep_run(run: SweepRun, cache: ResultCache | None = None) -> dict[str, Any]:
+    """Simulate a single run of a sweep
+
+    :param run: The run to simulate
+    :param cache: If set, results are read from and stored in this cache
+    :return: The result row of the run, with the run index, axes, and RESULT_COLUMNS
+    """
+    row: dict[str, Any] = {"run": run.index, **run.axis_values}
+
+    key = cache_key(
+        run.config, seed=run.seed, time=run.time, stop_tolerance=run.stop_tolerance
+    )
+    cached = cache.get(key) if cache is not None else None
+    row["cached"] = cached is not None
+    if cached is not None:
+        row.update(cached)
+        return row
+
+    start_time = perf_counter()
+    runtime, stats = runtime_from_config(run.config, seed=run.seed)
+    stopping_rule = None
+    if run.stop_tolerance is not None:
+        stopping_rule = stats.watch_throughput(run.stop_tolerance)
+    runtime.step_until(run.time, progress_interval=None, stopping_rule=stopping_rule)
+    summary = stats.summary()
+    row.update(summary)
+    row["wall_seconds"] = perf_counter() - start_time
+    if cache is not None:
+        cache.put(key, summary)
+    return row
+
+
+def _set_value(config: Any, path: list[str], value: Any) -> None:
+    """Set the value at a dotted path in a configuration
+
+    :param config: The configuration, as parsed from YAML. It's modified in place.
+    :param path: The dotted path, split into its parts
+    :param value: The value to set
+    :raises KeyError: If the parent of the path doesn't exist in the configuration
+    """
+    *parents, key = path
+    if key == N_CELLS_KEY:
+        # Repeat the picker in place
+        pickers = _get_value(config, parents[:-1])
+        index = int(parents[-1])
+        pickers[index : index + 1] = [
+            json.loads(json.dumps(pickers[index])) for _ in range(value)
+        ]
+        return
+
+    if parents and parents[-1] == "*":
+        containers = [
+            c
+            for c in _get_value(config, parents[:-1])
+            if isinstance(c, dict) and key in c
+        ]
+        if not containers:
+            raise KeyError(f"No item has the key {'.'.join(path)}")
+    else:
+        # Keys missing from the configuration are added, since they may have defaults
+        containers = [_get_value(config, parents)]
+
+    for container in containers:
+        if isinstance(container, list):
+            container[int(key)] = value
+        else:
+            container[key] = value
+
+
+def _get_value(config: Any, path: list[str]) -> Any:
+    for part in path:
+        config = config[int(part)] if isinstance(config, list) else config[part]
+    return config
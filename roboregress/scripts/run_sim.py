@@ -1,15 +1,169 @@
+import json
 import logging
-from argparse import ArgumentParser
+from argparse import ArgumentParser, Namespace
 from pathlib import Path
+from time import perf_counter
 
-from roboregress.engine import Visualizer
-from roboregress.robot.configuration import runtime_from_file
+from roboregress.engine import DEFAULT_SEED, SimulationRuntime, Visualizer
+from roboregress.robot.configuration import (
+    SimConfig,
+    load_config,
+    runtime_from_config,
+)
 from roboregress.robot.reporting import render_stats
+from roboregress.robot.result_cache import ResultCache, cache_key
+from roboregress.robot.snapshot import (
+    Snapshot,
+    restore_snapshot,
+    step_to_snapshot_point,
+    take_snapshot,
+)
+from roboregress.robot.statistics import StatsTracker
 
 
 def main() -> None:
     logging.basicConfig(level=logging.INFO)
 
+    parser = _create_parser()
+    args = parser.parse_args()
+
+    if args.headless and args.visualize:
+        parser.error("--headless and --visualize can't be used together")
+
+    config = load_config(args.config)
+    snapshot = _load_snapshot(parser, args, config)
+    key = cache_key(
+        config,
+        seed=args.seed,
+        time=args.time,
+        stop_tolerance=args.stop_tolerance,
+        resumed_from=snapshot,
+    )
+    cache = ResultCache() if args.cache and not args.visualize else None
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        logging.info(f"Found a cached result, skipping the simulation: {cached}")
+        return
+
+    runtime, stats = _create_runtime(parser, args, config, snapshot)
+
+    stopping_rule = stats.stopping_rule
+    profile = runtime.enable_profiling() if args.profile is not None else None
+
+    visualizer = Visualizer(statistics=stats) if args.visualize else None
+    start_time = perf_counter()
+    start_steps, start_timestamp = runtime.n_steps, runtime.timestamp
+
+    # Without checkpoints, the whole simulation runs in one go
+    interval = args.time if args.save_checkpoint is None else args.checkpoint_interval
+    while runtime.timestamp < args.time:
+        runtime.step_until(
+            timestamp=min(runtime.timestamp + interval, args.time),
+            visualizer=visualizer,
+            progress_interval=None if args.headless else args.progress_interval,
+            stopping_rule=stopping_rule,
+        )
+        # Snapshots are taken at the next move of the wood, unless the run ends first
+        if args.save_checkpoint is not None and step_to_snapshot_point(
+            runtime, stats, timestamp=args.time
+        ):
+            snapshot = take_snapshot(runtime, stats, config, seed=args.seed)
+            snapshot.save(args.save_checkpoint)
+        if stopping_rule is not None and stopping_rule.converged:
+            logging.info("Stopping early, the throughput has reached a steady state")
+            break
+
+    wall_time = perf_counter() - start_time
+    simulated_time = runtime.timestamp - start_timestamp
+    logging.info(
+        f"Simulated {round(simulated_time)}s in {wall_time:.2f}s of wall time: "
+        f"{(runtime.n_steps - start_steps) / wall_time:.0f} steps/s, "
+        f"{simulated_time / wall_time:.0f} simulated s/s"
+    )
+    query_cache = stats.wood.query_cache
+    logging.info(
+        f"Wood query cache: {query_cache.hits} hits, {query_cache.misses} misses "
+        f"({query_cache.hit_rate:.0%} hit rate)"
+    )
+
+    if profile is not None:
+        args.profile.write_text(json.dumps(profile.to_dict(), indent=2))
+        logging.info(f"Saved the profile to {args.profile}")
+
+    save_to = args.save_to if args.save_to else args.config.with_suffix(".html")
+    render_stats(stats, save_to=save_to, config_file=args.config, profile=profile)
+    if cache is not None:
+        cache.put(key, stats.summary())
+    logging.info("Finished Simulation!")
+
+
+def _load_snapshot(
+    parser: ArgumentParser, args: Namespace, config: SimConfig
+) -> Snapshot | None:
+    """Load the snapshot to resume from, if one was passed, and check that it can be
+    resumed with the arguments
+
+    :param parser: The parser of the arguments, to report errors with
+    :param args: The parsed arguments
+    :param config: The configuration to simulate
+    :return: The snapshot, or None if the simulation starts from scratch
+    """
+    if args.resume_from is None:
+        return None
+    if not args.resume_from.exists():
+        parser.error(f"There is no snapshot at {args.resume_from}")
+
+    snapshot = Snapshot.load(args.resume_from)
+    if snapshot.seed != args.seed:
+        parser.error(f"{args.resume_from} is a snapshot of a run with another seed")
+    saving_to = args.save_checkpoint
+    if (
+        snapshot.config != config
+        and saving_to is not None
+        and saving_to.resolve() == args.resume_from.resolve()
+    ):
+        parser.error(
+            "Forking would overwrite the snapshot it forks from. Pass another file "
+            "to --save-checkpoint."
+        )
+    return snapshot
+
+
+def _create_runtime(
+    parser: ArgumentParser,
+    args: Namespace,
+    config: SimConfig,
+    snapshot: Snapshot | None,
+) -> tuple[SimulationRuntime, StatsTracker]:
+    """Create the runtime, resuming from the snapshot if there is one. A snapshot
+    taken with different conveyor or cell parameters is forked with the new ones.
+
+    :param parser: The parser of the arguments, to report errors with
+    :param args: The parsed arguments
+    :param config: The configuration to simulate
+    :param snapshot: The snapshot to resume from, from _load_snapshot
+    :return: The runtime, and the stats tracker of the simulation
+    """
+    if snapshot is None:
+        runtime, stats = runtime_from_config(config, seed=args.seed)
+        if args.stop_tolerance is not None:
+            stats.watch_throughput(args.stop_tolerance)
+        return runtime, stats
+
+    if snapshot.config != config:
+        logging.info("Forking the snapshot with the changed configuration")
+    logging.info(f"Resuming from the snapshot at {round(snapshot.timestamp)}s")
+    try:
+        return restore_snapshot(
+            snapshot, config=config, stop_tolerance=args.stop_tolerance
+        )
+    except ValueError as e:
+        parser.error(
+            f"{args.resume_from} can't be resumed with this configuration: {e}"
+        )
+
+
+def _create_parser() -> ArgumentParser:
     parser = ArgumentParser()
     parser.add_argument("-v", "--visualize", action="store_true", default=False)
     parser.add_argument("-c", "--config", type=Path, required=True)
@@ -27,16 +181,68 @@ def main() -> None:
         default=8 * 60 * 60,
         help="How long to run the simulation for. By default it will run for 8 hours",
     )
-    args = parser.parse_args()
-
-    runtime, stats = runtime_from_file(args.config)
-
-    visualizer = Visualizer(statistics=stats) if args.visualize else None
-    runtime.step_until(timestamp=args.time, visualizer=visualizer)
-
-    save_to = args.save_to if args.save_to else args.config.with_suffix(".html")
-    render_stats(stats, save_to=save_to, config_file=args.config)
-    logging.info("Finished Simulation!")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        default=False,
+        help="Run as fast as possible, without a progress bar or visualization. "
+        "Useful for batch jobs, where the progress bar would flood the logs.",
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=0.1,
+        help="The minimum number of wall-clock seconds between progress bar updates",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=DEFAULT_SEED,
+        help="The seed for the random streams of the simulation",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        default=False,
+        help="Reuse the result of an identical earlier run instead of simulating, and "
+        "cache the result otherwise. Cached runs only log their summary, without "
+        "rendering a report.",
+    )
+    parser.add_argument(
+        "--save-checkpoint",
+        type=Path,
+        default=None,
+        help="Save a snapshot of the simulation to this file as it runs",
+    )
+    parser.add_argument(
+        "--resume-from",
+        type=Path,
+        default=None,
+        help="Resume the simulation from this snapshot. If --config changes the "
+        "conveyor or cell parameters, the snapshot is forked with them.",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=60 * 60,
+        help="How many simulated seconds to run between snapshots. Each snapshot is "
+        "taken at the first move of the wood after the interval.",
+    )
+    parser.add_argument(
+        "--stop-tolerance",
+        type=float,
+        default=None,
+        help="Stop before --time once the steady-state throughput is known to within "
+        "this fraction, at 95%% confidence. For example, 0.05 stops at +-5%%.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        help="Record how each sim object is stepped and how much wall time it takes. "
+        "The profile is added to the report, and saved to this file as JSON.",
+    )
+    return parser
 
 
 if __name__ == "__main__":
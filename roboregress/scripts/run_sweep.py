@@ -0,0 +1,70 @@
+import csv
+import logging
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from roboregress.robot.result_cache import ResultCache
+from roboregress.robot.sweep import (
+    RESULT_COLUMNS,
+    expand_sweep,
+    load_sweep,
+    run_sweep_run,
+)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    parser = ArgumentParser(
+        description="Run a simulation for every combination of values in a sweep"
+    )
+    parser.add_argument("-s", "--sweep", type=Path, required=True)
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        required=False,
+        help="Where to write the results, as CSV. Defaults to the name of the sweep "
+        "file",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="How many processes to run simulations in. Defaults to the CPU count",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        default=False,
+        help="Reuse the results of identical earlier runs instead of simulating them, "
+        "and cache the results of the rest",
+    )
+    args = parser.parse_args()
+
+    sweep = load_sweep(args.sweep)
+    runs = list(expand_sweep(sweep))
+    output = args.output if args.output else args.sweep.with_suffix(".csv")
+    cache = ResultCache() if args.cache else None
+    logging.info(f"Running {len(runs)} simulations, writing results to {output}")
+
+    with output.open("w", newline="") as f, ProcessPoolExecutor(args.workers) as pool:
+        writer = csv.DictWriter(f, fieldnames=["run", *sweep.axes, *RESULT_COLUMNS])
+        writer.writeheader()
+
+        # Workers are reused across runs. Rows are written as soon as each run ends.
+        futures = [pool.submit(run_sweep_run, run, cache) for run in runs]
+        for n_done, future in enumerate(as_completed(futures), start=1):
+            row = future.result()
+            writer.writerow(row)
+            f.flush()
+            logging.info(
+                f"Finished run {row['run']} ({n_done}/{len(runs)}): "
+                f"{row['throughput_meters']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
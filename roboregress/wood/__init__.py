@@ -1,4 +1,6 @@
+from .fastener_store import FastenerStore
 from .fasteners import FASTENER_COLORS, Fastener
+from .query_cache import QueryCache
 from .surfaces import SURFACE_COLORS, SURFACE_NORMALS, Surface
 from .wood import (
     FASTENER_IDX,
@@ -6,5 +8,6 @@ from .wood import (
     SURFACE_IDX,
     MovedWhileWorkActive,
     MoveScheduled,
+    PickRequest,
     Wood,
 )
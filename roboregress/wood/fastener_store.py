@@ -0,0 +1,407 @@
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from .fasteners import Fastener
+from .surfaces import Surface
+
+# Create constants to represent the API for the legacy fastener object array
+POSITION_IDX = 0
+SURFACE_IDX = 1
+FASTENER_IDX = 2
+
+SURFACES: tuple[Surface, ...] = tuple(Surface)
+"""Lookup table from a surface code to the Surface it represents"""
+
+FASTENERS: tuple[Fastener, ...] = tuple(Fastener)
+"""Lookup table from a fastener code to the Fastener it represents"""
+
+SURFACE_CODES: dict[Surface, int] = {s: code for code, s in enumerate(SURFACES)}
+FASTENER_CODES: dict[Fastener, int] = {f: code for code, f in enumerate(FASTENERS)}
+
+CODE_DTYPE = np.int8
+"""The dtype used for storing surface and fastener codes"""
+
+
+def fastener_type_mask(fastener_types: Iterable[Fastener]) -> npt.NDArray[np.bool_]:
+    """Create a lookup table, indexable by fastener code, that is True for each of the
+    given fastener types
+
+    :param fastener_types: The fastener types to include
+    :return: The lookup table
+    """
+    mask = np.zeros(len(FASTENERS), dtype=np.bool_)
+    mask[[FASTENER_CODES[f] for f in fastener_types]] = True
+    return mask
+
+
+def fastener_probability_table(
+    probabilities: Mapping[Fastener, float],
+) -> npt.NDArray[np.float64]:
+    """Create a lookup table, indexable by fastener code, of the probability of each
+    fastener type
+
+    :param probabilities: The probability of each fastener type. Fastener types that
+        aren't specified have a probability of 0.
+    :return: The lookup table
+    """
+    table = np.zeros(len(FASTENERS), dtype=np.float64)
+    for fastener_type, probability in probabilities.items():
+        table[FASTENER_CODES[fastener_type]] = probability
+    return table
+
+
+_MIN_CAPACITY = 1024
+"""The smallest number of rows a FastenerStore will allocate room for"""
+
+_FRONTIER_SEARCH_CHUNK = 256
+"""How many rows to search at a time when looking for the new highest fastener of a
+type, after the previous highest one was removed"""
+
+
+class FastenerStore:
+    """A struct-of-arrays container for fasteners, kept sorted by position.
+
+    Instead of a single object array of (position, Surface, Fastener) rows, each
+    attribute is stored in its own typed column, with surfaces and fastener types
+    encoded as small integers (see SURFACE_CODES and FASTENER_CODES). This lets every
+    filter over the fasteners run as a vectorized numeric comparison.
+
+    Rows are always in ascending position order, so the fasteners within a position
+    range can be found with a binary search (see `window`).
+
+    Since new board is generated behind all existing fasteners, the columns live at
+    the end of preallocated buffers that leave room in front of them. Prepending rows
+    only copies the new rows, and the buffers grow geometrically when they run out of
+    room, so the cost of growing the board is amortized.
+
+    Deleted fasteners are only marked as dead in the `live` column (a tombstone), and
+    the dead rows are compacted away lazily, once they make up most of the store. Any
+    query over the rows must filter by the `live` column.
+
+    The highest position of each fastener type (the 'frontier') is maintained as rows
+    are added and removed, so it can be looked up without searching the rows.
+    """
+
+    def __init__(
+        self,
+        positions: npt.ArrayLike | None = None,
+        surfaces: npt.ArrayLike | None = None,
+        types: npt.ArrayLike | None = None,
+    ) -> None:
+        positions = np.asarray(
+            positions if positions is not None else (), dtype=np.float64
+        )
+        surfaces = np.asarray(surfaces if surfaces is not None else (), CODE_DTYPE)
+        types = np.asarray(types if types is not None else (), dtype=CODE_DTYPE)
+
+        if not len(positions) == len(surfaces) == len(types):
+            raise ValueError("All fastener columns must be the same length!")
+
+        if np.any(positions[1:] < positions[:-1]):
+            order = np.argsort(positions, kind="stable")
+            positions, surfaces, types = positions[order], surfaces[order], types[order]
+
+        self._positions = positions
+        self._surfaces = surfaces
+        self._types = types
+        self._live = np.ones(len(positions), dtype=np.bool_)
+        """The buffers backing each column"""
+
+        self._start = 0
+        self._stop = len(positions)
+        """The rows of the buffers that are in use"""
+
+        self._n_dead = 0
+        """The number of rows in use that are tombstones"""
+
+        self._highest = np.full(len(FASTENERS), -np.inf)
+        """The highest position of each fastener type, indexed by fastener code.
+        -inf for fastener types that aren't in the store."""
+        self._update_highest(self.positions, self.types)
+
+    def __len__(self) -> int:
+        """The number of (live) fasteners in the store"""
+        return self.n_rows - self._n_dead
+
+    @property
+    def n_rows(self) -> int:
+        """The number of rows in the store, including tombstones"""
+        return self._stop - self._start
+
+    @property
+    def positions(self) -> npt.NDArray[np.float64]:
+        """A view of the positions of each row, in ascending order"""
+        return self._positions[self._start : self._stop]
+
+    @property
+    def surfaces(self) -> npt.NDArray[np.int8]:
+        """A view of the surface code of each row"""
+        return self._surfaces[self._start : self._stop]
+
+    @property
+    def types(self) -> npt.NDArray[np.int8]:
+        """A view of the fastener code of each row"""
+        return self._types[self._start : self._stop]
+
+    @property
+    def live(self) -> npt.NDArray[np.bool_]:
+        """A view of whether each row is a fastener, or a tombstone of a deleted one"""
+        return self._live[self._start : self._stop]
+
+    @property
+    def highest_positions(self) -> npt.NDArray[np.float64]:
+        """The highest position of each fastener type
+
+        :return: A read-only view, indexed by fastener code. -inf for fastener types
+            that aren't in the store.
+        """
+        highest = self._highest.view()
+        highest.flags.writeable = False
+        return highest
+
+    def window(
+        self, start_pos: float, end_pos: float, position_offset: float = 0
+    ) -> tuple[int, int]:
+        """Find the rows of fasteners within the position range (start_pos, end_pos]
+
+        :param start_pos: The exclusive lower bound of the range
+        :param end_pos: The inclusive upper bound of the range
+        :param position_offset: An offset added to each position before comparing it
+            to the range. The comparison is exact for the offset positions, so rows
+            match exactly when (position + position_offset) is within the range.
+        :return: The (start, stop) row indices, to be used as a slice
+        """
+        start = self._upper_bound(start_pos, position_offset)
+        stop = self._upper_bound(end_pos, position_offset)
+        return start, max(start, stop)
+
+    def _upper_bound(self, value: float, position_offset: float) -> int:
+        """Count the rows where (position + position_offset) <= value"""
+        positions = self.positions
+        index = int(np.searchsorted(positions, value - position_offset, "right"))
+
+        # Subtracting the offset from the value can round differently than adding it
+        # to the positions, so correct for the rows right at the boundary
+        while index < len(positions) and positions[index] + position_offset <= value:
+            index += 1
+        while index > 0 and positions[index - 1] + position_offset > value:
+            index -= 1
+        return index
+
+    def extend(self, other: "FastenerStore") -> None:
+        """Merge the fasteners from another store into this one, keeping the rows
+        sorted by position
+
+        :param other: The store to merge in. It isn't modified.
+        """
+        if len(other) == 0:
+            return
+
+        if self.n_rows == 0 or other.positions[-1] <= self.positions[0]:
+            # The common case: new board is generated 'behind' all existing fasteners
+            self._prepend(other)
+            return
+
+        # Otherwise, fall back to merging and sorting everything
+        self._replace(
+            positions=np.concatenate((self.positions[self.live], other.positions)),
+            surfaces=np.concatenate((self.surfaces[self.live], other.surfaces)),
+            types=np.concatenate((self.types[self.live], other.types)),
+        )
+
+    def delete(self, indices: npt.NDArray[np.intp]) -> bool:
+        """Remove the fasteners at the given row indices, in one batch
+
+        :param indices: The rows to remove. They must not have already been deleted.
+        :raises ValueError: If any of the rows were already deleted
+        :return: True if the rows were compacted, which changes the row index of every
+            fastener. Otherwise, the rows are only tombstoned, and keep their indices.
+        """
+        if len(indices) == 0:
+            return False
+
+        live = self.live
+        if not np.all(live[indices]):
+            raise ValueError("Fasteners can't be deleted twice!")
+        live[indices] = False
+        self._n_dead += len(np.unique(indices))
+
+        # Only search for a new frontier for types that lost their highest fastener
+        deleted_types = self.types[indices]
+        lost_frontier = self.positions[indices] == self._highest[deleted_types]
+        for code in np.unique(deleted_types[lost_frontier]):
+            self._highest[code] = self._find_highest(code)
+
+        # Only pay for compaction once tombstones make up most of the rows
+        if self._n_dead > len(self):
+            self._compact()
+            return True
+        return False
+
+    def split_off(self, start: int) -> "FastenerStore":
+        """Remove the rows from `start` onwards
+
+        :param start: The first row to remove
+        :return: The removed fasteners, as a new store
+        """
+        removed_live = self.live[start:]
+        removed = FastenerStore(
+            positions=self.positions[start:][removed_live],
+            surfaces=self.surfaces[start:][removed_live],
+            types=self.types[start:][removed_live],
+        )
+        self._n_dead -= len(removed_live) - len(removed)
+        self._stop = self._start + start
+
+        for code in np.unique(removed.types):
+            self._highest[code] = self._find_highest(code)
+        return removed
+
+    def get_state(self) -> dict[str, Any]:
+        """Get the rows of the store, including tombstones, for snapshots
+
+        :return: The columns of the rows, as JSON-compatible lists
+        """
+        return {
+            "positions": self.positions.tolist(),
+            "surfaces": self.surfaces.tolist(),
+            "types": self.types.tolist(),
+            "live": self.live.tolist(),
+        }
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        """Replace every row with the rows of a snapshot. See get_state.
+
+        :param state: The state, as returned by get_state
+        """
+        self._replace(
+            positions=np.asarray(state["positions"], dtype=np.float64),
+            surfaces=np.asarray(state["surfaces"], dtype=CODE_DTYPE),
+            types=np.asarray(state["types"], dtype=CODE_DTYPE),
+        )
+        live = self.live
+        live[:] = state["live"]
+        self._n_dead = self.n_rows - int(np.count_nonzero(live))
+
+        # Tombstones don't count towards the frontier
+        self._highest[:] = -np.inf
+        self._update_highest(self.positions[live], self.types[live])
+
+    def count_by_surface_and_type(self) -> npt.NDArray[np.int64]:
+        """Count the fasteners in this store
+
+        :return: An array of shape (n_surfaces, n_fastener_types), indexable by codes
+        """
+        live = self.live
+        flat_codes = self.surfaces[live].astype(np.intp) * len(FASTENERS)
+        flat_codes += self.types[live]
+        counts = np.bincount(flat_codes, minlength=len(SURFACES) * len(FASTENERS))
+        return counts.reshape(len(SURFACES), len(FASTENERS))
+
+    def _compact(self) -> None:
+        """Drop all tombstones, moving the live rows to the end of the buffers to
+        keep the room in front of them for new board"""
+        live = self.live
+        new_start = self._stop - len(self)
+        for buffer, column in (
+            (self._positions, self.positions),
+            (self._surfaces, self.surfaces),
+            (self._types, self.types),
+        ):
+            buffer[new_start : self._stop] = column[live]
+        self._live[new_start : self._stop] = True
+        self._start = new_start
+        self._n_dead = 0
+
+    def _prepend(self, other: "FastenerStore") -> None:
+        """Add rows that are all positioned before the existing rows"""
+        n_new = len(other)
+        if self._start < n_new:
+            self._reallocate(min_capacity=len(self) + n_new)
+
+        new_start = self._start - n_new
+        self._positions[new_start : self._start] = other.positions[other.live]
+        self._surfaces[new_start : self._start] = other.surfaces[other.live]
+        self._types[new_start : self._start] = other.types[other.live]
+        self._live[new_start : self._start] = True
+        self._start = new_start
+        self._update_highest(other.positions[other.live], other.types[other.live])
+
+    def _reallocate(self, min_capacity: int) -> None:
+        """Move the fasteners to the end of new, larger buffers, dropping tombstones"""
+        capacity = max(2 * min_capacity, _MIN_CAPACITY)
+        new_start = capacity - len(self)
+
+        live = self.live
+        positions = np.empty(capacity, dtype=np.float64)
+        surfaces = np.empty(capacity, dtype=CODE_DTYPE)
+        types = np.empty(capacity, dtype=CODE_DTYPE)
+        positions[new_start:] = self.positions[live]
+        surfaces[new_start:] = self.surfaces[live]
+        types[new_start:] = self.types[live]
+
+        self._positions, self._surfaces, self._types = positions, surfaces, types
+        self._live = np.ones(capacity, dtype=np.bool_)
+        self._start, self._stop = new_start, capacity
+        self._n_dead = 0
+
+    def _replace(
+        self,
+        positions: npt.NDArray[np.float64],
+        surfaces: npt.NDArray[np.int8],
+        types: npt.NDArray[np.int8],
+    ) -> None:
+        """Replace all rows with the given (possibly unsorted) columns"""
+        replacement = FastenerStore(positions=positions, surfaces=surfaces, types=types)
+        self._positions = replacement.positions
+        self._surfaces = replacement.surfaces
+        self._types = replacement.types
+        self._live = replacement.live
+        self._start, self._stop = 0, replacement.n_rows
+        self._n_dead = 0
+        self._highest = replacement.highest_positions.copy()
+
+    def _update_highest(
+        self, positions: npt.NDArray[np.float64], types: npt.NDArray[np.int8]
+    ) -> None:
+        """Raise the frontier of each type to include newly added fasteners"""
+        np.maximum.at(self._highest, types.astype(np.intp), positions)
+
+    def _find_highest(self, code: int) -> float:
+        """Search for the highest live fastener of a type, starting from the top.
+
+        The search covers geometrically growing chunks of rows, since the next
+        highest fastener is usually close to the previous one.
+
+        :param code: The fastener code of the type
+        :return: The highest position, or -inf if there are no fasteners of the type
+        """
+        positions, types, live = self.positions, self.types, self.live
+        stop = len(positions)
+        chunk = _FRONTIER_SEARCH_CHUNK
+        while stop > 0:
+            start = max(stop - chunk, 0)
+            matches = np.flatnonzero(live[start:stop] & (types[start:stop] == code))
+            if len(matches):
+                return float(positions[start + matches[-1]])
+            stop = start
+            chunk *= 2
+        return -np.inf
+
+    def to_object_array(self, position_offset: float = 0) -> npt.NDArray[np.object_]:
+        """Create an object array of shape (n_fasteners, 3), where each row is
+        (position, Surface, Fastener). This is the legacy representation, indexable
+        using POSITION_IDX, SURFACE_IDX, and FASTENER_IDX.
+
+        :param position_offset: An offset to add to all positions
+        :return: The object array
+        """
+        live = self.live
+        array = np.empty((len(self), 3), dtype=object)
+        array[:, POSITION_IDX] = (self.positions[live] + position_offset).tolist()
+        array[:, SURFACE_IDX] = [SURFACES[code] for code in self.surfaces[live]]
+        array[:, FASTENER_IDX] = [FASTENERS[code] for code in self.types[live]]
+        return array
@@ -0,0 +1,55 @@
+from collections.abc import Callable, Hashable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class QueryCache:
+    """A cache for the results of queries over the fasteners of a Wood.
+
+    Every change to the fasteners (a pick or a move) starts a new 'version' of the
+    wood, which drops every cached result. Within a version, the conveyor and every
+    robot cell share the results of identical queries, instead of each rebuilding the
+    same masks over the same fasteners.
+
+    Cached results are shared, so they must not be mutated by the caller.
+    """
+
+    def __init__(self) -> None:
+        self._results: dict[Hashable, Any] = {}
+
+        self.version = 0
+        """Incremented every time the cache is invalidated"""
+        self.hits = 0
+        """The number of queries answered from the cache"""
+        self.misses = 0
+        """The number of queries that had to be computed"""
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of queries that were answered from the cache"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key: Hashable, compute: Callable[..., T], *args: Any) -> T:
+        """Return the cached result for a query, computing and caching it if this is
+        the first time the query was made for the current version
+
+        :param key: A key that uniquely identifies the query and its parameters
+        :param compute: A function to compute the result of the query
+        :param args: The arguments to call compute with
+        :return: The result of the query
+        """
+        try:
+            result: T = self._results[key]
+        except KeyError:
+            self.misses += 1
+            result = self._results[key] = compute(*args)
+        else:
+            self.hits += 1
+        return result
+
+    def invalidate(self) -> None:
+        """Drop all cached results, because the fasteners have changed"""
+        self._results.clear()
+        self.version += 1
@@ -1,17 +1,33 @@
 import contextlib
-import random
-from collections import Counter
-from collections.abc import Generator
+from collections.abc import Generator, Iterable, Sequence
+from typing import Any, NamedTuple
 
 import numpy as np
 import numpy.typing as npt
 import open3d as o3d
 from pydantic import BaseModel
 
-from ..engine import BaseSimObject
+from ..engine import BaseSimObject, Event
 from ..engine.base_simulation_object import LoopGenerator
 from ..robot.vis_constants import WOOD_DIST_FROM_CELL_CENTER
+
+# FASTENER_IDX, POSITION_IDX and SURFACE_IDX are re-exported for the legacy fastener
+# array API
+from .fastener_store import (  # noqa: F401
+    CODE_DTYPE,
+    FASTENER_CODES,
+    FASTENER_IDX,
+    FASTENERS,
+    POSITION_IDX,
+    SURFACE_CODES,
+    SURFACE_IDX,
+    SURFACES,
+    FastenerStore,
+    fastener_probability_table,
+    fastener_type_mask,
+)
 from .fasteners import FASTENER_COLORS, Fastener
+from .query_cache import QueryCache
 from .surfaces import SURFACE_NORMALS, Surface
 
 
@@ -23,10 +39,17 @@ class MovedWhileWorkActive(Exception):
     """Raised when an attempt is made to move the wood while work is happening on it"""
 
 
-# Create constants to represent the API for the fastener array
-POSITION_IDX = 0
-SURFACE_IDX = 1
-FASTENER_IDX = 2
+class PickRequest(NamedTuple):
+    """The parameters of a single pick, for resolving many picks at once with
+    `Wood.pick_many`. See `Wood.pick` for the meaning of each field."""
+
+    from_surface: Surface
+    start_pos: float
+    end_pos: float
+    pick_probabilities: dict[Fastener, float]
+    n_fasteners_to_sample: int | None = 1
+    rng: np.random.Generator | None = None
+
 
 _FASTENER_BUFFER_LEN = 10
 """How many meters of fasteners to have generated before the first cell of the robot.
@@ -38,7 +61,15 @@ class Wood(BaseSimObject):
         fastener_densities: dict[Fastener, float]
         """Number of fasteners per meter, adjuster for each fastener type"""
 
-    def __init__(self, parameters: Parameters) -> None:
+    def __init__(
+        self, parameters: Parameters, rng: np.random.Generator | None = None
+    ) -> None:
+        """
+        :param parameters: The wood parameters
+        :param rng: The random generator to draw new boards from, and the outcomes of
+            picks that don't bring their own generator. If not set, a generator with
+            fresh entropy is used, so outcomes won't be reproducible.
+        """
         super().__init__()
 
         assert len(parameters.fastener_densities) == len(
@@ -46,23 +77,46 @@ class Wood(BaseSimObject):
         ), "All fastener types must be specified!"
 
         self._params = parameters
+        self._rng = rng if rng is not None else np.random.default_rng()
         self._no_new_work = False
         """When True, attempting to get work_lock will raise an exception"""
         self._ongoing_work = 0
         """Number of holders of a work_lock"""
 
+        self._total_translated = 0.0
+        """The amount of translation the board has gone through. This is also the
+        offset between board coordinates and robot coordinates."""
+
         self._fasteners = self.generate_board(
             start_pos=-_FASTENER_BUFFER_LEN,
             end_pos=0,
             fastener_densities=self._params.fastener_densities,
+            rng=self._rng,
         )
-        """A numpy array of shape (n_fasteners, 3) where the first index is the
-        position, the second index is the surface, and the third index is the type of
-        fastener."""
+        """The fasteners on the board, stored as typed columns of positions, surface
+        codes, and fastener codes. Positions are in board coordinates, which don't
+        change as the board moves. Add _total_translated to get the position relative
+        to the robot."""
+
+        self._retire_after: float | None = None
+        """Fasteners past this position can no longer be picked, and are retired"""
+        self._retired_fasteners = np.zeros(
+            (len(SURFACES), len(FASTENERS)), dtype=np.int64
+        )
+        """Counts of retired fasteners, indexed by (surface code, fastener code)"""
 
         self._total_picked_fasteners: int = 0
-        self._total_translated = 0.0
-        """The amount of translation the board has gone through"""
+
+        self.query_cache = QueryCache()
+        """Caches queries over the fasteners until the next pick or move"""
+
+        # Events for sim objects to wait on, instead of polling the wood
+        self.moved = Event()
+        """Fired whenever the wood moves"""
+        self.picked = Event()
+        """Fired whenever fasteners are picked from the wood"""
+        self.work_released = Event()
+        """Fired whenever the last holder of a work_lock releases it"""
 
     @property
     def processed_board(self) -> float:
@@ -75,14 +129,53 @@ class Wood(BaseSimObject):
         return self._total_picked_fasteners
 
     def missed_fasteners(self, after_pos: float = 0) -> dict[Fastener, int]:
-        """Count how many fasteners of each type exist past the given position mark"""
-        if self._fasteners is None:
-            return {}
+        """Count how many fasteners of each type exist past the given position mark,
+        including any fasteners that have been retired
+
+        :param after_pos: The position past which fasteners are counted
+        :raises ValueError: If fasteners have been retired at a position before
+            after_pos, in which case they can't be counted accurately
+        :return: The count of fasteners of each type
+        """
+        counts = self._retired_fasteners.sum(axis=0)
+        if (
+            counts.any()
+            and self._retire_after is not None
+            and after_pos > self._retire_after
+        ):
+            raise ValueError(
+                f"Fasteners past {self._retire_after=} have been retired, their "
+                f"positions are unknown! {after_pos=}"
+            )
 
-        missed_fasteners = self._fasteners[self._fasteners[:, POSITION_IDX] > after_pos]
-        missed_fastener_types = missed_fasteners[:, FASTENER_IDX].tolist()
-        missed = dict(Counter(missed_fastener_types))
-        return {f: missed.get(f, 0) for f in Fastener}
+        start, _ = self._board_window(after_pos, float("inf"))
+        live_types = self._fasteners.types[start:][self._fasteners.live[start:]]
+        counts += np.bincount(live_types, minlength=len(FASTENERS))
+        return {f: int(counts[FASTENER_CODES[f]]) for f in Fastener}
+
+    @property
+    def retired_fasteners(self) -> dict[tuple[Surface, Fastener], int]:
+        """The number of fasteners of each surface and type that have been retired"""
+        return {
+            (surface, fastener): int(self._retired_fasteners[s_code, f_code])
+            for s_code, surface in enumerate(SURFACES)
+            for f_code, fastener in enumerate(FASTENERS)
+        }
+
+    def retire_fasteners_after(self, position: float) -> None:
+        """Stop tracking the positions of fasteners once they travel past a position,
+        and keep only a count of them instead. This keeps the working set of
+        fasteners bounded, no matter how long the board gets.
+
+        This should be set to the end of the last cell, since no robot can pick past
+        that point. Fasteners are retired before each move, so any robot still gets a
+        chance at fasteners that the last move pushed past the retirement position.
+
+        :param position: The position past which fasteners are retired
+        """
+        self._retire_after = position
+        self.query_cache.invalidate()
+        self._retire_fasteners()
 
     @property
     def board_length(self) -> float:
@@ -90,10 +183,74 @@ class Wood(BaseSimObject):
         return self._total_translated + _FASTENER_BUFFER_LEN
 
     @property
-    def fasteners(self) -> npt.NDArray[np.float64] | None:
-        if self._fasteners is None:
-            return self._fasteners
-        return self._fasteners.copy()
+    def n_fasteners(self) -> int:
+        """The number of fasteners currently on the board"""
+        return len(self._fasteners)
+
+    @property
+    def fasteners(self) -> npt.NDArray[np.object_] | None:
+        """A copy of the fasteners as an object array
+
+        :return: An array of shape (n_fasteners, 3), indexable with POSITION_IDX,
+            SURFACE_IDX, and FASTENER_IDX. None if there are no fasteners on the board.
+        """
+        if len(self._fasteners) == 0:
+            return None
+        return self._fasteners.to_object_array(position_offset=self._total_translated)
+
+    def fastener_positions(
+        self,
+        surface: Surface | None = None,
+        fastener_types: Iterable[Fastener] | None = None,
+        start_pos: float = -float("inf"),
+        end_pos: float = float("inf"),
+    ) -> npt.NDArray[np.float64]:
+        """Return the positions of all fasteners matching the filters
+
+        :param surface: If set, only fasteners on this surface are returned
+        :param fastener_types: If set, only fasteners of these types are returned
+        :param start_pos: Only fasteners after this (exclusive) position are returned
+        :param end_pos: Only fasteners up to this (inclusive) position are returned
+        :return: The positions of the matching fasteners, in ascending order. This is
+            new array, that the caller may modify.
+        """
+        if fastener_types is not None:
+            fastener_types = frozenset(fastener_types)
+        rows, positions = self._filtered_fasteners(surface, fastener_types)
+        start, stop = np.searchsorted(positions, (start_pos, end_pos), "right")
+        live = self._fasteners.live[rows[start : max(start, stop)]]
+        return positions[start : max(start, stop)][live]
+
+    def fastener_columns(
+        self,
+    ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.int8], npt.NDArray[np.int8]]:
+        """Return copies of the fasteners on the board as typed columns, for callers
+        that need to model the board themselves
+
+        :return: A tuple of (positions, surface codes, fastener codes) of each
+            fastener, in ascending order of position. Positions are relative to the
+            robot, and codes index into SURFACES and FASTENERS.
+        """
+        rows, positions = self._filtered_fasteners(None, None)
+        live = self._fasteners.live[rows]
+        rows = rows[live]
+        return (
+            positions[live],
+            self._fasteners.surfaces[rows],
+            self._fasteners.types[rows],
+        )
+
+    def highest_fastener_positions(self) -> dict[Fastener, float]:
+        """The position of the highest (furthest along) fastener of each type
+
+        :return: The highest position of each type. Types with no fasteners on the
+            board are left out.
+        """
+        highest = self._fasteners.highest_positions + self._total_translated
+        return {
+            FASTENERS[code]: float(highest[code])
+            for code in np.flatnonzero(np.isfinite(highest))
+        }
 
     @contextlib.contextmanager
     def work_lock(self) -> Generator[None, None, None]:
@@ -105,6 +262,9 @@ class Wood(BaseSimObject):
         yield
         self._ongoing_work -= 1
 
+        if self._ongoing_work == 0:
+            self.work_released.fire()
+
     def pick(
         self,
         from_surface: Surface,
@@ -112,6 +272,7 @@ class Wood(BaseSimObject):
         end_pos: float,
         pick_probabilities: dict[Fastener, float],
         n_fasteners_to_sample: int | None = 1,
+        rng: np.random.Generator | None = None,
     ) -> tuple[list[Fastener], bool]:
         """
         :param from_surface: What surface to attempt picking from
@@ -122,79 +283,146 @@ class Wood(BaseSimObject):
         :param n_fasteners_to_sample: The number of fasteners to 'sample' for a pick.
             This is useful for things like a rake that can attempt multiple picks at
             once. If None, all fasteners in the range will be 'attempted' at once.
-        :raises ValueError: If invalid parameters
+        :param rng: The random generator to draw the outcome of the pick from. If not
+            set, the wood's own generator is used.
         :return: A tuple of:
             - The types of successfully picked fasteners
             - Whether or not a pick was even attempted
         """
-        if self._ongoing_work == 0:
-            raise ValueError("Hey, you must acquire the work lock in order to operate!")
+        request = PickRequest(
+            from_surface=from_surface,
+            start_pos=start_pos,
+            end_pos=end_pos,
+            pick_probabilities=pick_probabilities,
+            n_fasteners_to_sample=n_fasteners_to_sample,
+            rng=rng,
+        )
+        return self.pick_many([request])[0]
 
-        if start_pos < 0 or end_pos <= 0 or start_pos >= end_pos:
-            raise ValueError(f"Invalid pick range! {start_pos=} {end_pos=}")
+    def pick_many(
+        self, requests: Sequence[PickRequest]
+    ) -> list[tuple[list[Fastener], bool]]:
+        """Resolve many picks at once, with the same results as calling `pick` for
+        each request in order.
 
-        if self._fasteners is None:
-            return [], False
+        The pick ranges of all requests are found in one pass, and the random draws of
+        consecutive requests are made in one batch per generator, wherever the order
+        of the random streams allows it. A request never attempts a fastener that an
+        earlier request in the batch picked.
 
-        fasteners_in_range_mask = np.logical_and(
-            self._fasteners[:, POSITION_IDX] > start_pos,
-            self._fasteners[:, POSITION_IDX] <= end_pos,
-        )
-        fasteners_on_surface_mask = self._fasteners[:, SURFACE_IDX] == from_surface
-        pickable_fasteners_mask = np.logical_and(
-            fasteners_in_range_mask, fasteners_on_surface_mask
-        )
+        :param requests: The picks to resolve, in order
+        :raises ValueError: If invalid parameters
+        :return: The result of each request, as returned by `pick`
+        """
+        if self._ongoing_work == 0:
+            raise ValueError("Hey, you must acquire the work lock in order to operate!")
+        if len(requests) == 0:
+            return []
 
-        # Now filter for fastener types that have nonzero chance of being picked
-        pickable_fastener_types = list(pick_probabilities)
-        for fastener_type in Fastener:
-            if fastener_type not in pickable_fastener_types:
-                # Filter out unpickable fasteners
-                pickable_fasteners_mask = np.logical_and(
-                    pickable_fasteners_mask,
-                    self._fasteners[:, FASTENER_IDX] != fastener_type,
+        for r in requests:
+            self._validate_pick_range(r.start_pos, r.end_pos)
+
+        # Find the fasteners within each pick range, for fastener types that have a
+        # nonzero chance of being picked
+        fasteners = self._fasteners
+        candidates = self._query_rows_many(
+            [
+                (
+                    r.from_surface,
+                    frozenset(r.pick_probabilities),
+                    r.start_pos,
+                    r.end_pos,
                 )
+                for r in requests
+            ]
+        )
 
-        # Finally, apply the mask to select only pickable fasteners
-        pickable_fasteners = self._fasteners[pickable_fasteners_mask]
+        attempted, picked = self._attempt_picks(requests, candidates)
 
-        # Randomly select up to 'n_fasteners_to_sample' from the group
-        if (
-            n_fasteners_to_sample is None
-            or len(pickable_fasteners) <= n_fasteners_to_sample
-        ):
-            fasteners_to_attempt = pickable_fasteners
-        else:
-            choices = np.random.choice(
-                len(pickable_fasteners), n_fasteners_to_sample, replace=False
+        results = [
+            (
+                [FASTENERS[code] for code in fasteners.types[picked_indices]],
+                len(attempts) > 0,
             )
-            assert len(choices) == n_fasteners_to_sample
-            fasteners_to_attempt = pickable_fasteners[choices]
-
-        picks: list[Fastener] = []
-
-        for fastener in fasteners_to_attempt:
-            fastener_type = fastener[FASTENER_IDX]
+            for attempts, picked_indices in zip(attempted, picked, strict=True)
+        ]
+
+        # Remove all the picked fasteners from the board in one batch. Picked rows are
+        # only tombstoned, so cached queries stay valid unless the rows were compacted.
+        all_picked = picked[0] if len(picked) == 1 else np.concatenate(picked)
+        if fasteners.delete(all_picked):
+            self.query_cache.invalidate()
+
+        n_picked = len(all_picked)
+        self._total_picked_fasteners += n_picked
+        if n_picked:
+            self.picked.fire()
+        return results
+
+    def pick_swath(
+        self,
+        from_surface: Surface,
+        start_pos: float,
+        end_pos: float,
+        pick_probabilities: dict[Fastener, float],
+        rng: np.random.Generator | None = None,
+    ) -> list[Fastener]:
+        """Attempt to pick every fastener in a range, like `pick` with
+        n_fasteners_to_sample=None, but resolve the attempts in aggregate.
 
-            pick_probability = pick_probabilities[fastener_type]
-            assert pick_probability > 0
+        Instead of resolving each fastener on its own, the number of picks of each
+        fastener type is sampled from a binomial distribution, and that many fasteners
+        of the type are then removed at random. The outcome has the same distribution
+        as `pick`, but draws from the random stream differently.
 
-            if random.random() > pick_probability:
-                # The pick failed
-                continue
+        :param from_surface: What surface to attempt picking from
+        :param start_pos: The 'start' of the picking range
+        :param end_pos: The 'end' of the picking range
+        :param pick_probabilities: The probability of picking any of the types of
+            fasteners
+        :param rng: The random generator to draw the outcome from. If not set, the
+            wood's own generator is used.
+        :raises ValueError: If invalid parameters
+        :return: The types of successfully picked fasteners
+        """
+        if self._ongoing_work == 0:
+            raise ValueError("Hey, you must acquire the work lock in order to operate!")
+        self._validate_pick_range(start_pos, end_pos)
 
-            # Proceed to remove the fastener from the array
-            index = np.where(np.all(self._fasteners == fastener, axis=-1))[0][0]
-            self._fasteners = np.delete(self._fasteners, index, axis=0)
+        fasteners = self._fasteners
+        (pickable_fasteners,) = self._query_rows_many(
+            [(from_surface, frozenset(pick_probabilities), start_pos, end_pos)]
+        )
+        if len(pickable_fasteners) == 0:
+            return []
 
-            # Track the pick
-            picks.append(fastener_type)
+        # Sample how many fasteners of each type get picked
+        rng = rng if rng is not None else self._rng
+        types = fasteners.types[pickable_fasteners]
+        counts = np.bincount(types, minlength=len(FASTENERS))
+        n_picks = rng.binomial(counts, fastener_probability_table(pick_probabilities))
+
+        # Remove the picked fasteners of each type in bulk
+        picked_indices = []
+        for code in np.flatnonzero(n_picks).tolist():
+            of_type = pickable_fasteners[types == code]
+            if n_picks[code] < counts[code]:
+                of_type = of_type[
+                    rng.choice(counts[code], n_picks[code], replace=False)
+                ]
+            picked_indices.append(of_type)
+        if len(picked_indices) == 0:
+            return []
 
-        # Do some sanity checks here
-        attempted_pick = len(fasteners_to_attempt) > 0
+        if fasteners.delete(np.concatenate(picked_indices)):
+            self.query_cache.invalidate()
 
+        picks = [
+            FASTENERS[code] for code in np.repeat(np.arange(len(FASTENERS)), n_picks)
+        ]
         self._total_picked_fasteners += len(picks)
-        return picks, attempted_pick
+        self.picked.fire()
+        return picks
 
     def schedule_move(self) -> None:
         self._no_new_work = True
@@ -215,110 +443,307 @@ class Wood(BaseSimObject):
         if not self.ready_for_move():
             raise MovedWhileWorkActive
 
-        # "translate" all fasteners by adding the distance
-        if self._fasteners is not None:
-            self._fasteners[:, POSITION_IDX] += distance
-
-        # Backfill the new empty space in the buffer
-        end_pos = -_FASTENER_BUFFER_LEN + distance
-        if end_pos != -_FASTENER_BUFFER_LEN:
-            # Sometimes, the distance is technically nonzero, but once added with the
-            # buffer len, it becomes == buffer len due to floating point math.
-            self._fasteners = self.generate_board(
-                start_pos=-_FASTENER_BUFFER_LEN,
-                end_pos=end_pos,
+        # Stop tracking fasteners that can no longer be picked
+        self.query_cache.invalidate()
+        self._retire_fasteners()
+
+        # "translate" all fasteners, by moving the robot frame along the board
+        previous_buffer_start = -_FASTENER_BUFFER_LEN - self._total_translated
+        self._total_translated += distance
+        buffer_start = -_FASTENER_BUFFER_LEN - self._total_translated
+
+        # Backfill the new empty space in the buffer. Both ends are derived from the
+        # translation, so the backfilled regions always tile the board exactly.
+        if buffer_start < previous_buffer_start:
+            self.generate_board(
+                start_pos=buffer_start,
+                end_pos=previous_buffer_start,
                 fastener_densities=self._params.fastener_densities,
+                rng=self._rng,
                 append_to=self._fasteners,
             )
 
         # Clear the work-blocking flag
         self._no_new_work = False
+        self.moved.fire()
 
-        # Update the board length
-        self._total_translated += distance
+    def _attempt_picks(
+        self,
+        requests: Sequence[PickRequest],
+        candidates: list[npt.NDArray[np.intp]],
+    ) -> tuple[list[npt.NDArray[np.intp]], list[npt.NDArray[np.intp]]]:
+        """Select and resolve the attempts of each pick request, in order
+
+        :param requests: The pick requests
+        :param candidates: The rows of the pickable fasteners for each request
+        :return: The (attempted rows, picked rows) of each request
+        """
+        fasteners = self._fasteners
+        attempted: list[npt.NDArray[np.intp]] = []
+        picked: list[npt.NDArray[np.intp]] = []
+        pending: list[int] = []
+        """Requests with attempts that haven't been resolved yet"""
+        picked_by_surface: dict[Surface, list[npt.NDArray[np.intp]]] = {}
+
+        def resolve_pending() -> None:
+            """Resolve the pending attempts, each succeeding with its type's
+            probability. One random draw is made per generator for all of them, which
+            is identical to drawing for each request in turn."""
+            n_draws: dict[np.random.Generator, int] = {}
+            for i in pending:
+                rng = requests[i].rng or self._rng
+                n_draws[rng] = n_draws.get(rng, 0) + len(attempted[i])
+            draws = {rng: rng.random(n) for rng, n in n_draws.items() if n}
+            offsets = dict.fromkeys(draws, 0)
+
+            for i in pending:
+                attempts = attempted[i]
+                if len(attempts) == 0:
+                    picked.append(attempts)
+                    continue
+
+                probabilities = fastener_probability_table(
+                    requests[i].pick_probabilities
+                )[fasteners.types[attempts]]
+                assert np.all(probabilities > 0)
+                rng = requests[i].rng or self._rng
+                offset = offsets[rng]
+                succeeded = draws[rng][offset : offset + len(attempts)] <= probabilities
+                offsets[rng] += len(attempts)
+
+                picked.append(attempts[succeeded])
+                picked_by_surface.setdefault(requests[i].from_surface, []).append(
+                    picked[-1]
+                )
+            pending.clear()
+
+        for i, request in enumerate(requests):
+            pickable_fasteners = candidates[i]
+
+            # Leave out fasteners picked by earlier requests. Their attempts must be
+            # resolved first, if they were on the same surface.
+            if any(requests[j].from_surface == request.from_surface for j in pending):
+                resolve_pending()
+            earlier_picks = picked_by_surface.get(request.from_surface)
+            if earlier_picks and len(pickable_fasteners):
+                pickable_fasteners = pickable_fasteners[
+                    ~np.isin(pickable_fasteners, np.concatenate(earlier_picks))
+                ]
+
+            # Randomly select up to 'n_fasteners_to_sample' from the group. Earlier
+            # attempts are resolved first, to keep the order of the random stream.
+            n_to_sample = request.n_fasteners_to_sample
+            if n_to_sample is not None and len(pickable_fasteners) > n_to_sample:
+                resolve_pending()
+                choices = (request.rng or self._rng).choice(
+                    len(pickable_fasteners), n_to_sample, replace=False
+                )
+                assert len(choices) == n_to_sample
+                pickable_fasteners = pickable_fasteners[choices]
+
+            attempted.append(pickable_fasteners)
+            pending.append(i)
+        resolve_pending()
+        return attempted, picked
+
+    @staticmethod
+    def _validate_pick_range(start_pos: float, end_pos: float) -> None:
+        if start_pos < 0 or end_pos <= 0 or start_pos >= end_pos:
+            raise ValueError(f"Invalid pick range! {start_pos=} {end_pos=}")
+
+    def _query_rows_many(
+        self,
+        queries: list[tuple[Surface | None, frozenset[Fastener] | None, float, float]],
+    ) -> list[npt.NDArray[np.intp]]:
+        """Find the rows of the live fasteners matching each of many queries
+
+        :param queries: Queries of (surface, fastener types, start_pos, end_pos), for
+            fasteners within (start_pos, end_pos] that match the filters
+        :return: The rows matching each query, in ascending order of position
+        """
+        # Queries sharing the same filters are searched together
+        queries_by_filter: dict[
+            tuple[Surface | None, frozenset[Fastener] | None], list[int]
+        ] = {}
+        for i, (surface, fastener_types, _, _) in enumerate(queries):
+            queries_by_filter.setdefault((surface, fastener_types), []).append(i)
+
+        live = self._fasteners.live
+        results: list[npt.NDArray[np.intp]] = [np.empty(0, np.intp)] * len(queries)
+        for (surface, fastener_types), indices in queries_by_filter.items():
+            rows, positions = self._filtered_fasteners(surface, fastener_types)
+            bounds = [bound for i in indices for bound in queries[i][2:]]
+            windows = positions.searchsorted(bounds, "right").tolist()
+            for i, start, stop in zip(
+                indices, windows[::2], windows[1::2], strict=True
+            ):
+                window = rows[start : max(start, stop)]
+                results[i] = window[live[window]]
+        return results
+
+    def _filtered_fasteners(
+        self, surface: Surface | None, fastener_types: frozenset[Fastener] | None
+    ) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.float64]]:
+        """Find all fasteners on a surface and of some types, through the query cache.
+        Any position range can then be found within them by binary search.
+
+        Picked fasteners stay in the store as tombstones until it's compacted, so the
+        cached rows stay valid as fasteners are picked. They may include tombstones,
+        so they must be filtered by the `live` column before use.
+
+        :param surface: The surface to filter on, or None for every surface
+        :param fastener_types: The types to filter on, or None for every type
+        :return: The (rows, positions) of the matching fasteners, with positions
+            relative to the robot and in ascending order. Both are read-only.
+        """
+        return self.query_cache.get(
+            ("filtered", surface, fastener_types),
+            self._compute_filtered_fasteners,
+            surface,
+            fastener_types,
+        )
+
+    def _compute_filtered_fasteners(
+        self, surface: Surface | None, fastener_types: frozenset[Fastener] | None
+    ) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.float64]]:
+        """The uncached implementation of _filtered_fasteners"""
+        mask = np.ones(self._fasteners.n_rows, dtype=np.bool_)
+        if surface is not None:
+            mask &= self._fasteners.surfaces == SURFACE_CODES[surface]
+        if fastener_types is not None:
+            mask &= fastener_type_mask(fastener_types)[self._fasteners.types]
+        rows = np.flatnonzero(mask)
+        positions = self._fasteners.positions[rows] + self._total_translated
+        rows.flags.writeable = False
+        positions.flags.writeable = False
+        return rows, positions
+
+    def _board_window(self, start_pos: float, end_pos: float) -> tuple[int, int]:
+        """Find the rows of fasteners within a range relative to the robot
+
+        :param start_pos: The exclusive lower bound of the range
+        :param end_pos: The inclusive upper bound of the range
+        :return: The (start, stop) row indices, to be used as a slice
+        """
+        return self._fasteners.window(
+            start_pos, end_pos, position_offset=self._total_translated
+        )
+
+    def _retire_fasteners(self) -> None:
+        """Fold all fasteners past the retirement position into the retired counts"""
+        if self._retire_after is None:
+            return
+
+        start, _ = self._board_window(self._retire_after, float("inf"))
+        retired = self._fasteners.split_off(start)
+        if len(retired):
+            self._retired_fasteners += retired.count_by_surface_and_type()
 
     @staticmethod
     def generate_board(
         start_pos: float,
         end_pos: float,
         fastener_densities: dict[Fastener, float],
-        append_to: npt.NDArray[np.float64] | None = None,
-    ) -> npt.NDArray[np.float64] | None:
+        rng: np.random.Generator,
+        append_to: FastenerStore | None = None,
+    ) -> FastenerStore:
         """Returns a board array
         :param start_pos: Which position to 'start' placing fasteners in
         :param end_pos: Which position to 'stop' placing fasteners in
         :param fastener_densities: The densities of fasteners in 'fasteners / meter'
-        :param append_to: The generated board will be appended to the this array and
+        :param rng: The random generator to draw fastener counts, positions, and
+            surfaces from
+        :param append_to: The generated board will be appended to the this store and
             returned.
 
         :raises ValueError: If the board length is negative
-        :return: The fastener array
+        :return: The fastener store
         """
-        """Returns more board"""
         if not end_pos > start_pos:
             raise ValueError(f"Length cannot be invalid! {start_pos=} {end_pos=}")
 
-        board = append_to
         length = end_pos - start_pos
+        densities = np.array([fastener_densities.get(f, 0) for f in FASTENERS])
+
+        # Figure out how many fasteners to generate of each type. Take care of any
+        # 'remainder' by using random chance to add 1 fastener.
+        expected_counts = length * densities
+        counts = expected_counts.astype(np.int64)
+        counts += (expected_counts % 1) > rng.random(len(FASTENERS))
+
+        n_fasteners = int(counts.sum())
+        board = FastenerStore(
+            positions=rng.random(n_fasteners) * length + start_pos,
+            surfaces=rng.integers(len(SURFACES), size=n_fasteners, dtype=CODE_DTYPE),
+            types=np.repeat(np.arange(len(FASTENERS), dtype=CODE_DTYPE), counts),
+        )
+        if append_to is None:
+            return board
 
-        for fastener_type, density in fastener_densities.items():
-            # Figure out how many fasteners to generate of this type
-            n_fasteners = length * density
-            if (n_fasteners % 1) > random.random():
-                # Take care of any 'remainder' by using random chance to add 1 fastener
-                n_fasteners += 1
-            n_fasteners = int(n_fasteners)
-
-            new_fasteners = np.array(
-                [
-                    (
-                        random.random() * length + start_pos,
-                        random.choice(list(Surface)),
-                        fastener_type,
-                    )
-                    for _ in range(n_fasteners)
-                ]
-            )
-            if len(new_fasteners):
-                board = (
-                    new_fasteners
-                    if board is None
-                    else np.concatenate((board, new_fasteners))
-                )
-
-        return board
+        append_to.extend(board)
+        return append_to
 
     # Sim object methods
+    def get_state(self) -> dict[str, Any]:
+        """Get the fasteners, counters and random state of the wood, for snapshots.
+        The retirement position isn't included, since it comes from the configuration.
+
+        :raises ValueError: If any work lock is held, since holders can't be restored
+        :return: The state, as JSON-compatible values
+        """
+        if self._ongoing_work != 0:
+            raise ValueError("The wood can't be snapshotted while work is ongoing!")
+        return {
+            "fasteners": self._fasteners.get_state(),
+            "total_translated": self._total_translated,
+            "retired_fasteners": self._retired_fasteners.tolist(),
+            "total_picked_fasteners": self._total_picked_fasteners,
+            "no_new_work": self._no_new_work,
+            "rng": self._rng.bit_generator.state,
+        }
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        """Restore the wood from a snapshot. See get_state.
+
+        :param state: The state, as returned by get_state
+        """
+        self._fasteners.set_state(state["fasteners"])
+        self._total_translated = state["total_translated"]
+        self._retired_fasteners = np.array(state["retired_fasteners"], dtype=np.int64)
+        self._total_picked_fasteners = state["total_picked_fasteners"]
+        self._no_new_work = state["no_new_work"]
+        self._rng.bit_generator.state = state["rng"]
+        self.query_cache.invalidate()
+
     def _loop(self) -> LoopGenerator:
         """Wood doesn't do anything in the sim, it only handles visualizations"""
         while True:
-            yield None
+            yield self.moved
 
     def draw(self) -> list[o3d.geometry.Geometry]:
         # Create a point cloud with colored points for each surface
-        if self._fasteners is None:
+        if len(self._fasteners) == 0:
             return []
 
+        # Translate the points so each line of points is 'closer' to the appropriate
+        # surface
+        surface_offsets = (
+            np.array([SURFACE_NORMALS[s] for s in SURFACES])
+            * WOOD_DIST_FROM_CELL_CENTER
+        )
+
         point_cloud = o3d.geometry.PointCloud()
         for fastener_type in Fastener:
-            # Create the list of points representing the fasteners on this surface
-            fasteners = self._fasteners[
-                self._fasteners[:, FASTENER_IDX] == fastener_type
-            ]
-            points_on_surface = np.zeros((len(fasteners), 3))
-            points_on_surface[:, 0] = fasteners[:, POSITION_IDX].copy()
-
-            # Translate it so the line of points is 'closer' to the appropriate surface
-            for i in range(len(points_on_surface)):
-                surface = fasteners[i, SURFACE_IDX]
-                translate = (
-                    np.array(SURFACE_NORMALS[surface]) * WOOD_DIST_FROM_CELL_CENTER
-                )
-                points_on_surface[i] += translate
+            # Create the list of points representing the fasteners of this type
+            of_type = self._fasteners.live & (
+                self._fasteners.types == FASTENER_CODES[fastener_type]
+            )
+            points = surface_offsets[self._fasteners.surfaces[of_type]]
+            points[:, 0] += self._fasteners.positions[of_type] + self._total_translated
 
             # Create the point cloud and paint it appropriately
             surface_cloud = o3d.geometry.PointCloud()
-            surface_cloud.points = o3d.utility.Vector3dVector(points_on_surface)
+            surface_cloud.points = o3d.utility.Vector3dVector(points)
             surface_cloud.paint_uniform_color(FASTENER_COLORS[fastener_type])
             point_cloud += surface_cloud
 
@@ -1,11 +1,14 @@
 import math
 from collections.abc import Generator
 
+import numpy as np
 import open3d as o3d
 import pytest
 
 from roboregress.engine import (
     BaseSimObject,
+    BatchMeansStoppingRule,
+    Event,
     NoObjectsToStep,
     NoTimestampProgression,
     SimulationRuntime,
@@ -18,7 +21,7 @@ class BasicObject(BaseSimObject):
         self.delay = delay
         self.call_count = 0
 
-    def _loop(self) -> Generator[float | None, None, None]:
+    def _loop(self) -> Generator[float | Event | None, None, None]:
         while True:
             self.call_count += 1
             yield self.delay
@@ -27,6 +30,11 @@ class BasicObject(BaseSimObject):
         return []
 
 
+def _sleeping_objects(runtime: SimulationRuntime) -> dict[BaseSimObject, float]:
+    """The wake timestamp of every sleeping object of a runtime"""
+    return {sim_object: wake for wake, _, sim_object in runtime._wake_queue}
+
+
 def test_step() -> None:
     runtime = SimulationRuntime()
 
@@ -47,7 +55,7 @@ def test_step() -> None:
     assert obj_large_delay.call_count == 1
 
     # Two of three of the objects should be 'asleep', the other should not
-    assert runtime._sleeping_objects == {
+    assert _sleeping_objects(runtime) == {
         obj_small_delay: obj_small_delay.delay,
         obj_large_delay: obj_large_delay.delay,
     }
@@ -67,7 +75,7 @@ def test_step() -> None:
     assert obj_large_delay.call_count == 1, "Should not have been called again"
 
     # Two of three objects should still be asleep
-    assert runtime._sleeping_objects == {
+    assert _sleeping_objects(runtime) == {
         # This means that the small delay obj should have been triggered, run, and then
         # scheduled again
         obj_small_delay: obj_small_delay.delay * 2,
@@ -84,7 +92,7 @@ def test_step() -> None:
     assert obj_large_delay.call_count == 2, "Should have been called again"
 
     # Check that the large_delay obj is now put back to sleep
-    assert runtime._sleeping_objects == {
+    assert _sleeping_objects(runtime) == {
         # This means that the small delay obj should have been triggered, run, and then
         # scheduled again
         obj_small_delay: obj_small_delay.delay * 2,
@@ -124,3 +132,161 @@ def test_step_until() -> None:
 
     assert obj_a.call_count == 9092
     assert math.isclose(runtime.timestamp, 10000.1)
+
+
+def test_step_only_wakes_due_objects() -> None:
+    """Objects waking on the same timestamp should be stepped in registration order,
+    and sleeping objects should never be stepped early"""
+    step_order: list[str] = []
+
+    class OrderedObject(BasicObject):
+        def __init__(self, name: str, delay: float | None):
+            super().__init__(delay=delay)
+            self.name = name
+
+        def step(self) -> float | Event | None:
+            step_order.append(self.name)
+            return super().step()
+
+    runtime = SimulationRuntime()
+    late = OrderedObject("late", delay=2.0)
+    first = OrderedObject("first", delay=1.0)
+    second = OrderedObject("second", delay=1.0)
+    runtime.register(late, first, second)
+
+    runtime.step()
+    assert step_order == ["late", "first", "second"]
+
+    # Both 1 second sleepers wake together, in the order they were registered
+    runtime.step()
+    assert runtime.timestamp == 1.0
+    assert step_order[3:] == ["first", "second"]
+
+    # The 2 second sleeper wakes together with the others' second sleep
+    runtime.step()
+    assert runtime.timestamp == 2.0
+    assert step_order[5:] == ["late", "first", "second"]
+    assert late.call_count == 2
+    assert first.call_count == second.call_count == 3
+
+
+def test_waiting_on_events() -> None:
+    """Objects waiting on an event should not be stepped until it fires, and then
+    resume as if they had been polling for it"""
+    event = Event()
+
+    class Firer(BaseSimObject):
+        def __init__(self) -> None:
+            super().__init__()
+            self.call_count = 0
+
+        def _loop(self) -> Generator[float | Event | None, None, None]:
+            while True:
+                self.call_count += 1
+                if self.call_count == 3:
+                    event.fire()
+                yield 1.0
+
+        def draw(self) -> list[o3d.geometry.Geometry]:
+            return []
+
+    class Waiter(BasicObject):
+        def _loop(self) -> Generator[float | Event | None, None, None]:
+            while True:
+                self.call_count += 1
+                yield event
+
+    runtime = SimulationRuntime()
+    early_waiter = Waiter(delay=None)
+    firer = Firer()
+    late_waiter = Waiter(delay=None)
+    runtime.register(early_waiter, firer, late_waiter)
+
+    runtime.step()
+    runtime.step()
+    assert early_waiter.call_count == late_waiter.call_count == 1
+    assert runtime._runnable == set()
+
+    # The event fires on the third step. Polling objects registered after the firer
+    # would see it in the same step, the ones registered before it in the next step.
+    runtime.step()
+    assert early_waiter.call_count == 1
+    assert late_waiter.call_count == 2
+
+    runtime.step()
+    assert early_waiter.call_count == 2
+    assert late_waiter.call_count == 2
+
+
+def test_step_until_headless() -> None:
+    """Running without a progress bar should behave exactly like running with one"""
+    runtime = SimulationRuntime()
+    obj_a = BasicObject(delay=1.1)
+    runtime.register(obj_a)
+
+    runtime.step_until(10000, progress_interval=None)
+
+    assert obj_a.call_count == 9092
+    assert runtime.n_steps == 9092
+    assert math.isclose(runtime.timestamp, 10000.1)
+
+
+def test_spawn_rng() -> None:
+    """Spawned generators should be reproducible from the seed, and independent of
+    each other"""
+    streams = [
+        [runtime.spawn_rng().random(4) for _ in range(3)]
+        for runtime in (SimulationRuntime(seed=5), SimulationRuntime(seed=5))
+    ]
+    assert all(np.array_equal(a, b) for a, b in zip(*streams, strict=True))
+
+    first, second, third = streams[0]
+    assert not np.array_equal(first, second)
+    assert not np.array_equal(second, third)
+
+    other_seed = SimulationRuntime(seed=6).spawn_rng().random(4)
+    assert not np.array_equal(first, other_seed)
+
+
+def test_step_until_stopping_rule() -> None:
+    runtime = SimulationRuntime()
+    obj = BasicObject(delay=1.0)
+    runtime.register(obj)
+
+    # The object is called at a perfectly steady rate, so the rule stops as soon as
+    # it has enough batches
+    rule = BatchMeansStoppingRule(
+        measure=lambda: obj.call_count, tolerance=0.01, batch_seconds=10
+    )
+    runtime.step_until(1000, progress_interval=None, stopping_rule=rule)
+    assert rule.converged
+    assert rule.rate == pytest.approx(1)
+    assert runtime.timestamp == 10 * (rule.warmup_batches + rule.min_batches)
+
+
+def test_profiling() -> None:
+    runtime = SimulationRuntime()
+    obj_no_delay = BasicObject(delay=None)
+    runtime.register(obj_no_delay)
+    profile = runtime.enable_profiling()
+
+    # Objects registered after profiling starts are profiled too
+    obj_delay = BasicObject(delay=1.0)
+    runtime.register(obj_delay)
+
+    for _ in range(3):
+        runtime.step()
+
+    assert profile.n_steps == 3
+    assert profile.simulated_seconds == runtime.timestamp == 2
+    assert [o.name for o in profile.objects] == ["BasicObject", "BasicObject"]
+
+    no_delay_profile, delay_profile = profile.objects
+    assert no_delay_profile.n_steps == no_delay_profile.n_no_progress == 3
+    assert delay_profile.n_steps == delay_profile.n_sleeps == 3
+    assert no_delay_profile.n_event_waits == delay_profile.n_event_waits == 0
+    assert profile.wall_seconds >= no_delay_profile.wall_seconds > 0
+    assert profile.to_dict()["objects"][1]["n_sleeps"] == 3
+
+    # Enabling profiling again keeps the same profile
+    assert runtime.enable_profiling() is profile
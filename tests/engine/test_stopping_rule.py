@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from roboregress.engine import BatchMeansStoppingRule
+
+
+def test_stopping_rule_drops_warmup() -> None:
+    rng = np.random.default_rng(0)
+    warmup = [0.0] * 5
+    steady = list(rng.normal(2, 0.1, size=100))
+
+    total = 0.0
+
+    def measure() -> float:
+        return total
+
+    rule = BatchMeansStoppingRule(measure=measure, tolerance=0.01, batch_seconds=1)
+    rule.update(0)
+    for batch, rate in enumerate(warmup + steady, start=1):
+        total += rate
+        if rule.update(batch):
+            break
+
+    assert rule.converged
+    assert rule.warmup_batches == len(warmup)
+    assert rule.warmup_seconds == len(warmup)
+    assert rule.rate is not None
+    assert rule.half_width is not None
+    assert rule.half_width <= 0.01 * rule.rate
+    assert rule.rate == pytest.approx(2, abs=rule.half_width * 2)
+
+
+def test_stopping_rule_noisy() -> None:
+    rng = np.random.default_rng(0)
+    total = 0.0
+
+    def measure() -> float:
+        return total
+
+    # Too noisy to reach the tolerance within the batches available
+    rule = BatchMeansStoppingRule(measure=measure, tolerance=0.01, batch_seconds=1)
+    rule.update(0)
+    for batch, rate in enumerate(rng.normal(2, 1, size=50), start=1):
+        total += rate
+        assert not rule.update(batch)
+
+    assert not rule.converged
+    assert rule.rate is not None
+    assert rule.half_width is not None
+    assert rule.half_width > 0.01 * rule.rate
+
+    # Batches shorter than batch_seconds don't count
+    n_batches = len(rule.batch_rates)
+    rule.update(50.5)
+    assert len(rule.batch_rates) == n_batches
+
+
+def test_stopping_rule_state() -> None:
+    total = 0.0
+
+    def measure() -> float:
+        return total
+
+    rule = BatchMeansStoppingRule(measure=measure, tolerance=0.01, batch_seconds=1)
+    rule.update(0)
+    for batch, rate in enumerate(np.random.default_rng(0).normal(2, 1, size=30), 1):
+        total += rate
+        rule.update(batch)
+
+    restored = BatchMeansStoppingRule(measure=measure, tolerance=0.01, batch_seconds=1)
+    restored.set_state(rule.get_state())
+    assert restored.get_state() == rule.get_state()
+    assert restored.warmup_batches == rule.warmup_batches
+    assert restored.rate == rule.rate
+    assert restored.half_width == rule.half_width
+
+    total += 2
+    assert restored.update(31) == rule.update(31)
+    assert restored.get_state() == rule.get_state()
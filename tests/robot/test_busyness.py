@@ -0,0 +1,108 @@
+from typing import Any
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from roboregress.robot.cell import BaseRobotCell, BigBird
+from roboregress.robot.conveyor.utils.busyness import (
+    calculate_busyness_at_position,
+    calculate_busyness_at_positions,
+    calculate_optimal_busyness_move,
+)
+from roboregress.robot.statistics import StatsTracker
+from roboregress.wood import Fastener, FastenerStore, Surface, Wood
+from roboregress.wood.fastener_store import FASTENER_CODES, SURFACE_CODES
+
+_ZERO_DENSITY_PARAMS = Wood.Parameters(
+    fastener_densities={fastener_type: 0 for fastener_type in Fastener}
+)
+
+
+def _create_cells(wood: Wood, start_positions: list[float]) -> list[BaseRobotCell[Any]]:
+    stats = StatsTracker(runtime=Mock(), wood=wood)
+    return [
+        BigBird(
+            BigBird.Parameters(
+                big_bird_pick_seconds=1,
+                pick_probabilities={Fastener.SCREW: 1.0},
+                start_pos=start_pos,
+                working_width=1.0,
+            ),
+            wood,
+            stats,
+        )
+        for start_pos in start_positions
+    ]
+
+
+def _create_wood(positions: list[float]) -> Wood:
+    wood = Wood(parameters=_ZERO_DENSITY_PARAMS)
+    wood._fasteners = FastenerStore(
+        positions=np.array(positions),
+        surfaces=np.array([SURFACE_CODES[Surface.TOP]] * len(positions)),
+        types=np.array([FASTENER_CODES[Fastener.SCREW]] * len(positions)),
+    )
+    return wood
+
+
+@pytest.mark.parametrize(
+    ("positions", "max_move", "expected_move"),
+    (
+        # Nothing to be busy with
+        ([], 5.0, 0.0),
+        # Already as busy as possible
+        ([0.5, 2.5], 5.0, 0.0),
+        # Both cells are busy for moves within (2.5, 3.5)
+        ([-0.5, -2.5], 5.0, 3.0),
+        # Both cells being busy is out of reach, but one can be for moves in (0.5, 1.5)
+        ([-0.5, -2.5], 1.5, 1.0),
+        # Both cells are only busy for moves within (2, 2.5)
+        ([0.5, -2.0], 5.0, 2.25),
+        # Fasteners exactly on the cell end don't make it busy
+        ([2.0], 1.0, 0.5),
+    ),
+)
+def test_optimal_busyness_move(
+    positions: list[float], max_move: float, expected_move: float
+) -> None:
+    """Test the exact best move on hand-picked cases, with cells at (0, 1) and (2, 3)"""
+    wood = _create_wood(positions)
+    cells = _create_cells(wood, start_positions=[0.0, 2.0])
+
+    move = calculate_optimal_busyness_move(wood=wood, cells=cells, max_move=max_move)
+    assert move == pytest.approx(expected_move)
+
+
+def test_optimal_busyness_move_matches_grid() -> None:
+    """The exact best move should be at least as good as any move on a fine grid"""
+    rng = np.random.default_rng(3)
+    for _ in range(20):
+        wood = _create_wood(sorted(rng.uniform(-10, 4, size=rng.integers(1, 15))))
+        cells = _create_cells(wood, start_positions=[0.0, 1.3, 2.6])
+        max_move = 4.0
+
+        move = calculate_optimal_busyness_move(
+            wood=wood, cells=cells, max_move=max_move
+        )
+        assert 0 <= move < max_move
+
+        best_busyness = calculate_busyness_at_position(wood, cells, move)
+        for candidate in np.arange(0, max_move, 0.01):
+            assert calculate_busyness_at_position(wood, cells, candidate) <= (
+                best_busyness
+            )
+
+
+def test_busyness_at_positions() -> None:
+    """The batched busyness should match evaluating each candidate on its own"""
+    rng = np.random.default_rng(4)
+    wood = _create_wood(sorted(rng.uniform(-10, 4, size=30)))
+    cells = _create_cells(wood, start_positions=[0.0, 1.3, 2.6])
+    candidates = np.arange(0, 5, 0.01)
+
+    busyness = calculate_busyness_at_positions(wood, cells, candidates)
+    assert busyness.tolist() == [
+        calculate_busyness_at_position(wood, cells, c) for c in candidates
+    ]
+    assert len(calculate_busyness_at_positions(wood, cells, [])) == 0
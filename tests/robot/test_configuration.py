@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from roboregress.robot.configuration import (
+    load_config,
+    runtime_from_config,
+    runtime_from_file,
+)
+from roboregress.robot.conveyor import LookaheadWoodConveyor
+
+_EXAMPLE_CONFIG = Path(__file__).parents[2] / "experiments" / "basic_example.yml"
+
+
+def test_replicas_in_one_process() -> None:
+    """Runtimes own their random streams, so replicas with the same seed should match
+    even when stepped in the same process, interleaved with other replicas"""
+    replicas = [runtime_from_file(_EXAMPLE_CONFIG, seed=seed) for seed in (1, 2, 1)]
+    for timestamp in range(60, 600, 60):
+        for runtime, _ in replicas:
+            runtime.step_until(timestamp, progress_interval=None)
+
+    picked = [stats.wood.total_picked_fasteners for _, stats in replicas]
+    assert picked[0] == picked[2]
+    assert picked[0] != picked[1]
+    assert replicas[0][0].timestamp == replicas[2][0].timestamp
+
+
+def test_lookahead_replicas() -> None:
+    """The lookahead conveyor budgets its search in modeled stages, not wall-clock
+    time, so replicas with the same seed should match however long planning takes"""
+    config = load_config(_EXAMPLE_CONFIG)
+    config.conveyor = LookaheadWoodConveyor.Parameters(
+        move_speed=0.5, lookahead_moves=3, max_stages=50
+    )
+    replicas = [runtime_from_config(config, seed=1) for _ in range(2)]
+    for runtime, _ in replicas:
+        runtime.step_until(120, progress_interval=None)
+
+    (runtime_a, stats_a), (runtime_b, stats_b) = replicas
+    assert runtime_a.timestamp == runtime_b.timestamp
+    assert stats_a.summary() == stats_b.summary()
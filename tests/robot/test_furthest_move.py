@@ -0,0 +1,78 @@
+from typing import Any
+from unittest.mock import Mock
+
+import numpy as np
+
+from roboregress.robot.cell import BaseRobotCell, BigBird
+from roboregress.robot.conveyor.utils.furthest_move import (
+    calculate_furthest_cell,
+    furthest_capable_cell_ends,
+)
+from roboregress.robot.statistics import StatsTracker
+from roboregress.wood import Fastener, FastenerStore, Surface, Wood
+from roboregress.wood.fastener_store import FASTENER_CODES, SURFACE_CODES
+
+_ZERO_DENSITY_PARAMS = Wood.Parameters(
+    fastener_densities={fastener_type: 0 for fastener_type in Fastener}
+)
+
+
+def test_calculate_furthest_cell() -> None:
+    """The furthest move should bring the highest fastener of each type to the end of
+    the furthest cell that can pick it, stopping at the closest of those"""
+    wood = Wood(parameters=_ZERO_DENSITY_PARAMS)
+    stats = StatsTracker(runtime=Mock(), wood=wood)
+    cells: list[BaseRobotCell[Any]] = [
+        BigBird(
+            BigBird.Parameters(
+                big_bird_pick_seconds=1,
+                pick_probabilities=pick_probabilities,
+                start_pos=start_pos,
+                working_width=1.0,
+            ),
+            wood,
+            stats,
+        )
+        for start_pos, pick_probabilities in (
+            (0.0, {Fastener.SCREW: 1.0, Fastener.STAPLE: 1.0}),
+            (2.0, {Fastener.SCREW: 1.0}),
+        )
+    ]
+    capable_cell_ends = furthest_capable_cell_ends(cells)
+    assert capable_cell_ends == {Fastener.SCREW: 3.0, Fastener.STAPLE: 1.0}
+
+    top = SURFACE_CODES[Surface.TOP]
+    screw, staple = FASTENER_CODES[Fastener.SCREW], FASTENER_CODES[Fastener.STAPLE]
+    flush_nail = FASTENER_CODES[Fastener.FLUSH_NAIL]
+    wood._fasteners = FastenerStore(
+        positions=np.array([-2.0, 0.5, 1.0, 9.0]),
+        surfaces=np.array([top] * 4),
+        types=np.array([screw, staple, screw, flush_nail]),
+    )
+
+    # The staple limits the move, and the flush nail can't be picked by any cell
+    move = calculate_furthest_cell(wood, cells, capable_cell_ends)
+    assert np.isclose(move, 0.5)
+    assert move < 0.5
+
+    # Once the staple is picked, the screw limits the move
+    with wood.work_lock():
+        wood.pick(Surface.TOP, 0, 1, {Fastener.STAPLE: 1.0}, n_fasteners_to_sample=1)
+    assert np.isclose(calculate_furthest_cell(wood, cells), 2.0)
+
+    # A board emptied by picks doesn't limit the move at all
+    wood._fasteners = FastenerStore(
+        positions=np.array([0.5, 9.0]),
+        surfaces=np.array([top] * 2),
+        types=np.array([screw, flush_nail]),
+    )
+    with wood.work_lock():
+        wood.pick(
+            Surface.TOP,
+            0,
+            10,
+            {Fastener.SCREW: 1.0, Fastener.FLUSH_NAIL: 1.0},
+            n_fasteners_to_sample=None,
+        )
+    assert wood.n_fasteners == 0
+    assert calculate_furthest_cell(wood, cells) == 0
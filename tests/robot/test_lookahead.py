@@ -0,0 +1,121 @@
+from typing import Any
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from roboregress.robot.cell import BaseRobotCell, BigBird, RollingRake
+from roboregress.robot.conveyor import LookaheadWoodConveyor, lookahead_wood_conveyor
+from roboregress.robot.conveyor.utils.furthest_move import (
+    calculate_furthest_cell,
+    furthest_capable_cell_ends,
+)
+from roboregress.robot.conveyor.utils.lookahead import LookaheadPlanner
+from roboregress.robot.statistics import StatsTracker
+from roboregress.wood import Fastener, FastenerStore, Surface, Wood
+from roboregress.wood.fastener_store import FASTENER_CODES, SURFACE_CODES
+
+_ZERO_DENSITY_PARAMS = Wood.Parameters(
+    fastener_densities={fastener_type: 0 for fastener_type in Fastener}
+)
+
+
+def _create_cell(positions: list[float]) -> tuple[Wood, BigBird]:
+    """Create a single BigBird cell spanning (0, 1)
+
+    :param positions: The positions of the screws on the top surface
+    :return: The wood, and the cell
+    """
+    wood = Wood(parameters=_ZERO_DENSITY_PARAMS)
+    wood._fasteners = FastenerStore(
+        positions=np.array(positions),
+        surfaces=np.array([SURFACE_CODES[Surface.TOP]] * len(positions)),
+        types=np.array([FASTENER_CODES[Fastener.SCREW]] * len(positions)),
+    )
+    cell = BigBird(
+        BigBird.Parameters(
+            big_bird_pick_seconds=2,
+            pick_probabilities={Fastener.SCREW: 0.5},
+            start_pos=0,
+            working_width=1.0,
+        ),
+        wood,
+        StatsTracker(runtime=Mock(), wood=wood),
+    )
+    assert cell.expected_work_seconds([Fastener.SCREW] * 3) == 12
+    return wood, cell
+
+
+def _create_planner(positions: list[float]) -> tuple[LookaheadPlanner, float]:
+    """Create a planner for a single BigBird cell spanning (0, 1)
+
+    :param positions: The positions of the screws on the top surface
+    :return: The planner, and the furthest move allowed
+    """
+    wood, cell = _create_cell(positions)
+    cells: list[BaseRobotCell[Any]] = [cell]
+    capable_cell_ends = furthest_capable_cell_ends(cells)
+    planner = LookaheadPlanner(
+        wood=wood,
+        cells=cells,
+        capable_cell_ends=capable_cell_ends,
+        move_speed=0.5,
+        candidate_moves=4,
+    )
+    return planner, calculate_furthest_cell(wood, cells, capable_cell_ends)
+
+
+@pytest.mark.parametrize("max_stages", (None, 0))
+def test_lookahead_planner_moves_within_reach(max_stages: int | None) -> None:
+    """Plans should never move a fastener out of reach, even when the stage budget
+    runs out immediately"""
+    planner, furthest_move = _create_planner([-3.0, -2.0, -0.5])
+    move = planner.plan(lookahead_moves=3, max_stages=max_stages)
+    assert 0 < move <= furthest_move
+
+
+def test_lookahead_planner_stage_budget() -> None:
+    """The search should stop deepening once it has modeled max_stages stages, and
+    fall back to the plan of the deepest fully searched length"""
+    planner, _ = _create_planner([-3.0, -2.0, -0.5])
+    shallow_move = planner.plan(lookahead_moves=1, max_stages=None)
+    n_shallow_stages = planner.n_stages
+
+    assert planner.plan(lookahead_moves=3, max_stages=0) == shallow_move
+    assert planner.n_stages == n_shallow_stages
+
+    planner.plan(lookahead_moves=3, max_stages=n_shallow_stages + 3)
+    assert planner.n_stages == n_shallow_stages + 3
+
+
+def test_lookahead_planner_waits_for_work() -> None:
+    """If the furthest move is tiny, it's better to let the cell clear its workspace
+    first, and then make a long move"""
+    planner, furthest_move = _create_planner([-3.0, 0.999])
+    assert 0 < furthest_move < 0.01
+    assert planner.plan(lookahead_moves=2, max_stages=None) == 0
+
+
+def test_lookahead_conveyor_skips_rakes(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Rakes of every kind, rolling rakes included, should be left out of the plan"""
+    wood, big_bird = _create_cell([-3.0, -2.0, -0.5])
+    rolling_rake = RollingRake(
+        RollingRake.Parameters(
+            rolling_rake_cycle_seconds=1,
+            pick_probabilities={Fastener.SCREW: 0.9},
+            start_pos=-0.5,
+        ),
+        wood,
+        StatsTracker(runtime=Mock(), wood=wood),
+    )
+    conveyor = LookaheadWoodConveyor(
+        params=LookaheadWoodConveyor.Parameters(move_speed=0.5, lookahead_moves=2),
+        wood=wood,
+        cells=[rolling_rake, big_bird],
+        wood_stats=Mock(),
+    )
+
+    planner_type = Mock(wraps=LookaheadPlanner)
+    monkeypatch.setattr(lookahead_wood_conveyor, "LookaheadPlanner", planner_type)
+    conveyor._plan_move()
+    assert planner_type.call_args.kwargs["cells"] == [big_bird]
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+
+from roboregress.robot import result_cache
+from roboregress.robot.configuration import (
+    load_config,
+    resolve_layout,
+    runtime_from_config,
+)
+from roboregress.robot.result_cache import ResultCache, cache_key
+from roboregress.robot.snapshot import step_to_snapshot_point, take_snapshot
+
+_EXAMPLE_CONFIG = Path(__file__).parents[2] / "experiments" / "basic_example.yml"
+
+
+def test_cache_key(monkeypatch: pytest.MonkeyPatch) -> None:
+    config = load_config(_EXAMPLE_CONFIG)
+    key = cache_key(config, seed=1, time=60)
+    assert key == cache_key(load_config(_EXAMPLE_CONFIG), seed=1, time=60)
+
+    # Explicitly placing the pickers where they would be placed changes nothing
+    assert any(params.start_pos == -1 for params in config.pickers)
+    assert cache_key(resolve_layout(config), seed=1, time=60) == key
+
+    assert cache_key(config, seed=2, time=60) != key
+    assert cache_key(config, seed=1, time=61) != key
+
+    # Changes to the simulation's code should never hit results of the old code
+    monkeypatch.setattr(result_cache, "source_hash", lambda: "edited")
+    assert cache_key(config, seed=1, time=60) != key
+    monkeypatch.undo()
+
+    config.conveyor.move_speed *= 2
+    assert cache_key(config, seed=1, time=60) != key
+
+
+def test_cache_key_resumed() -> None:
+    config = load_config(_EXAMPLE_CONFIG)
+    runtime, stats = runtime_from_config(config, seed=1)
+    runtime.step_until(300, progress_interval=None)
+    assert step_to_snapshot_point(runtime, stats, timestamp=float("inf"))
+    snapshot = take_snapshot(runtime, stats, config, seed=1)
+
+    # Resumed and forked runs never share results with fresh runs
+    key = cache_key(config, seed=1, time=600, resumed_from=snapshot)
+    assert key != cache_key(config, seed=1, time=600)
+    assert key == cache_key(config, seed=1, time=600, resumed_from=snapshot.copy())
+
+    # Nor with runs resumed from any other snapshot
+    runtime.step_until(400, progress_interval=None)
+    assert step_to_snapshot_point(runtime, stats, timestamp=float("inf"))
+    later_snapshot = take_snapshot(runtime, stats, config, seed=1)
+    assert cache_key(config, seed=1, time=600, resumed_from=later_snapshot) != key
+
+
+def test_result_cache(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path / "cache")
+    assert cache.get("key") is None
+
+    cache.put("key", {"throughput_meters": 0.5})
+    assert cache.get("key") == {"throughput_meters": 0.5}
+
+    cache.put("key", {"throughput_meters": 0.25})
+    assert cache.get("key") == {"throughput_meters": 0.25}
+    assert [p.name for p in (tmp_path / "cache").iterdir()] == ["key.json"]
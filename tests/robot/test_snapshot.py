@@ -0,0 +1,153 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from roboregress.engine import SimulationRuntime
+from roboregress.robot.configuration import SimConfig, load_config, runtime_from_config
+from roboregress.robot.snapshot import (
+    Snapshot,
+    restore_snapshot,
+    step_to_snapshot_point,
+    take_snapshot,
+)
+from roboregress.robot.statistics import StatsTracker
+
+_EXPERIMENTS = Path(__file__).parents[2] / "experiments"
+_EXAMPLE_CONFIG = _EXPERIMENTS / "basic_example.yml"
+
+
+def _snapshot_at(
+    config: SimConfig, timestamp: float, seed: int
+) -> tuple[SimulationRuntime, StatsTracker, Snapshot]:
+    """Run a simulation until the first snapshot point after a timestamp
+
+    :param config: The configuration to simulate
+    :param timestamp: The timestamp to run until, before looking for a snapshot point
+    :param seed: The seed of the simulation
+    :return: The runtime, its stats tracker, and the snapshot taken of it
+    """
+    runtime, stats = runtime_from_config(config, seed=seed)
+    runtime.step_until(timestamp, progress_interval=None)
+    assert step_to_snapshot_point(runtime, stats, timestamp=float("inf"))
+    return runtime, stats, take_snapshot(runtime, stats, config, seed=seed)
+
+
+def _robot_stats(stats: StatsTracker) -> list[dict[str, Any]]:
+    """The state of every robot's statistics, in a stable order
+
+    :param stats: The stats tracker
+    :return: The state of each robot's statistics
+    """
+    robots = sorted(
+        stats.robot_stats,
+        key=lambda r: (r.robot_params.start_pos, r.robot_params.pickable_surface.value),
+    )
+    return [robot.get_state() for robot in robots]
+
+
+@pytest.mark.parametrize(
+    ("config_file", "group_cell_surfaces"),
+    (
+        ("basic_example.yml", False),
+        ("basic_example.yml", True),
+        ("greedy_conveyor_example.yml", False),
+    ),
+)
+def test_snapshot_roundtrip(
+    tmp_path: Path, config_file: str, group_cell_surfaces: bool
+) -> None:
+    config = load_config(_EXPERIMENTS / config_file)
+    config.group_cell_surfaces = group_cell_surfaces
+    runtime, stats, snapshot = _snapshot_at(config, 300, seed=3)
+
+    snapshot_file = tmp_path / "snapshot.json"
+    snapshot.save(snapshot_file)
+    snapshot = Snapshot.load(snapshot_file)
+    assert snapshot.config == config
+
+    restored_runtime, restored_stats = restore_snapshot(snapshot)
+    assert restored_runtime.timestamp == runtime.timestamp
+    assert restored_runtime.n_steps == runtime.n_steps
+    assert restored_stats.summary() == stats.summary()
+
+    # The restored simulation should carry on exactly like the original
+    runtime.step_until(900, progress_interval=None)
+    restored_runtime.step_until(900, progress_interval=None)
+    assert restored_stats.summary() == stats.summary()
+    assert _robot_stats(restored_stats) == _robot_stats(stats)
+    assert restored_stats.wood.get_state() == stats.wood.get_state()
+
+
+def test_snapshot_fork() -> None:
+    config = load_config(_EXAMPLE_CONFIG)
+    _, stats, snapshot = _snapshot_at(config, 300, seed=3)
+
+    # Fork the warmed up simulation with a faster conveyor
+    faster_config = config.copy(deep=True)
+    faster_config.conveyor.move_speed *= 2
+    forked_runtime, forked_stats = restore_snapshot(snapshot, config=faster_config)
+    assert forked_stats.summary() == stats.summary()
+
+    forked_runtime.step_until(900, progress_interval=None)
+    restored_runtime, restored_stats = restore_snapshot(snapshot)
+    restored_runtime.step_until(900, progress_interval=None)
+    assert forked_stats.summary() != restored_stats.summary()
+
+    # Forks can't change the sim objects of the simulation
+    fewer_pickers_config = config.copy(deep=True)
+    fewer_pickers_config.pickers.pop()
+    with pytest.raises(ValueError):
+        restore_snapshot(snapshot, config=fewer_pickers_config)
+
+
+def test_snapshot_point() -> None:
+    config = load_config(_EXAMPLE_CONFIG)
+    runtime, stats = runtime_from_config(config, seed=3)
+
+    # Snapshots can only be taken while the wood moves, and not while cells pick
+    while stats.wood.currently_working or stats.wood.total_picked_fasteners == 0:
+        runtime.step()
+    with pytest.raises(ValueError):
+        take_snapshot(runtime, stats, config, seed=3)
+
+    assert step_to_snapshot_point(runtime, stats, timestamp=float("inf"))
+    take_snapshot(runtime, stats, config, seed=3)
+
+    # Stepping stops at the timestamp if there's no snapshot point before it
+    runtime.step()
+    assert not step_to_snapshot_point(runtime, stats, timestamp=runtime.timestamp)
+
+
+def test_snapshot_stopping_rule(tmp_path: Path) -> None:
+    config = load_config(_EXAMPLE_CONFIG)
+    runtime, stats = runtime_from_config(config, seed=3)
+    rule = stats.watch_throughput(0.05)
+    runtime.step_until(3600, progress_interval=None, stopping_rule=rule)
+    assert step_to_snapshot_point(runtime, stats, timestamp=float("inf"))
+
+    snapshot_file = tmp_path / "snapshot.json"
+    take_snapshot(runtime, stats, config, seed=3).save(snapshot_file)
+    snapshot = Snapshot.load(snapshot_file)
+
+    # A resumed run carries on measuring the batches of the original
+    resumed_runtime, resumed_stats = restore_snapshot(snapshot, stop_tolerance=0.05)
+    resumed_rule = resumed_stats.stopping_rule
+    assert resumed_rule is not None
+    assert resumed_rule.get_state() == rule.get_state()
+    runtime.step_until(7200, progress_interval=None, stopping_rule=rule)
+    resumed_runtime.step_until(7200, progress_interval=None, stopping_rule=resumed_rule)
+    assert resumed_rule.get_state() == rule.get_state()
+    assert resumed_stats.summary() == stats.summary()
+
+    # A fork measures another configuration, so its rule starts over
+    faster_config = config.copy(deep=True)
+    faster_config.conveyor.move_speed *= 2
+    _, forked_stats = restore_snapshot(
+        snapshot, config=faster_config, stop_tolerance=0.05
+    )
+    assert forked_stats.stopping_rule is not None
+    assert forked_stats.stopping_rule.batch_rates == []
+
+    _, restored_stats = restore_snapshot(snapshot)
+    assert restored_stats.stopping_rule is None
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import pytest
+import yaml
+
+from roboregress.robot.cell import SurfaceCellGroup
+from roboregress.robot.configuration import runtime_from_file
+
+_EXAMPLE_CONFIG = Path(__file__).parents[2] / "experiments" / "basic_example.yml"
+
+
+@pytest.mark.parametrize(
+    "conveyor",
+    (
+        {"move_speed": 0.5, "optimization_increment": 0.05},
+        {"move_speed": 0.5, "move_increment": 0.25},
+        {"move_speed": 0.5},
+    ),
+)
+def test_grouped_cells_match_ungrouped(
+    tmp_path: Path, conveyor: dict[str, float]
+) -> None:
+    """Grouping the arms of each cell should not change the simulation at all"""
+    results = []
+    for group_cell_surfaces in (False, True):
+        config = yaml.safe_load(_EXAMPLE_CONFIG.read_text())
+        config["conveyor"] = conveyor
+        config["group_cell_surfaces"] = group_cell_surfaces
+        config_file = tmp_path / f"{group_cell_surfaces}.yml"
+        config_file.write_text(yaml.safe_dump(config))
+
+        runtime, stats = runtime_from_file(config_file, seed=1337)
+        runtime.step_until(600, progress_interval=None)
+
+        n_groups = sum(isinstance(o, SurfaceCellGroup) for o in runtime._sim_objects)
+        assert n_groups == (len(config["pickers"]) if group_cell_surfaces else 0)
+
+        results.append(
+            (
+                runtime.timestamp,
+                stats.wood.total_picked_fasteners,
+                sorted(
+                    (
+                        cell_id,
+                        robot.robot_params.pickable_surface.value,
+                        robot.n_picked_fasteners,
+                        robot.work_timer.total_time_working,
+                        robot.waiting_for_wood_timer.total_time_working,
+                    )
+                    for cell_id, robot in stats.robots_by_cell
+                ),
+            )
+        )
+
+    assert results[0] == results[1]
+    assert results[0][1] > 0
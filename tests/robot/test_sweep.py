@@ -0,0 +1,134 @@
+from pathlib import Path
+
+import pytest
+import yaml
+from pydantic import ValidationError
+
+from roboregress.engine import DEFAULT_SEED
+from roboregress.robot.cell import BigBird, RollingRake
+from roboregress.robot.result_cache import ResultCache
+from roboregress.robot.sweep import (
+    RESULT_COLUMNS,
+    expand_sweep,
+    load_sweep,
+    run_sweep_run,
+)
+from roboregress.wood import Fastener
+
+_EXAMPLE_CONFIG = Path(__file__).parents[2] / "experiments" / "basic_example.yml"
+
+
+def _write_sweep(tmp_path: Path, axes: dict[str, list[object]]) -> Path:
+    sweep_file = tmp_path / "sweep.yml"
+    sweep_file.write_text(
+        yaml.safe_dump({"base_config": str(_EXAMPLE_CONFIG), "time": 60, "axes": axes})
+    )
+    return sweep_file
+
+
+def test_expand_sweep(tmp_path: Path) -> None:
+    sweep = load_sweep(
+        _write_sweep(
+            tmp_path,
+            {
+                "seed": [1, 2],
+                "conveyor.move_speed": [0.25, 1.0],
+                "pickers.*.big_bird_pick_seconds": [3],
+                "pickers.1.pick_probabilities.staple": [0.5],
+                "pickers.3.n_cells": [1, 3],
+            },
+        )
+    )
+    runs = list(expand_sweep(sweep))
+    assert len(runs) == 8
+    assert [run.index for run in runs] == list(range(8))
+    assert {run.seed for run in runs} == {1, 2}
+
+    run = runs[-1]
+    assert run.axis_values == {
+        "seed": 2,
+        "conveyor.move_speed": 1.0,
+        "pickers.*.big_bird_pick_seconds": 3,
+        "pickers.1.pick_probabilities.staple": 0.5,
+        "pickers.3.n_cells": 3,
+    }
+    assert run.config.conveyor.move_speed == 1.0
+
+    pickers = run.config.pickers
+    assert [type(p) for p in pickers] == [RollingRake.Parameters] + [
+        BigBird.Parameters
+    ] * 5 + [type(pickers[-1])]
+    assert all(
+        p.pick_seconds == 3 for p in pickers if isinstance(p, BigBird.Parameters)
+    )
+
+    # Values shared through YAML anchors should only be changed where they were set
+    staple_probabilities = [
+        p.pick_probabilities[Fastener.STAPLE]
+        for p in pickers
+        if isinstance(p, BigBird.Parameters)
+    ]
+    assert staple_probabilities == [0.5, 0.8, 0.8, 0.8, 0.8]
+
+
+def test_expand_sweep_without_axes(tmp_path: Path) -> None:
+    (run,) = expand_sweep(load_sweep(_write_sweep(tmp_path, {})))
+    assert run.seed == DEFAULT_SEED
+    assert run.axis_values == {}
+
+
+def test_expand_sweep_bad_axis(tmp_path: Path) -> None:
+    sweep = load_sweep(_write_sweep(tmp_path, {"pickers.*.no_such_key": [1]}))
+    with pytest.raises(KeyError):
+        list(expand_sweep(sweep))
+
+
+@pytest.mark.parametrize(
+    "axis", ("pickers.*.n_cells", "conveyor.n_cells", "n_cells", "pickers.*.*")
+)
+def test_load_sweep_bad_axis_path(tmp_path: Path, axis: str) -> None:
+    with pytest.raises(ValidationError, match="must"):
+        load_sweep(_write_sweep(tmp_path, {axis: [2]}))
+
+
+def test_run_sweep_run(tmp_path: Path) -> None:
+    run, _ = expand_sweep(load_sweep(_write_sweep(tmp_path, {"seed": [1, 2]})))
+
+    row = run_sweep_run(run)
+    steady_state_columns = {
+        "steady_state_throughput_meters",
+        "steady_state_half_width_meters",
+        "warmup_seconds",
+        "converged",
+    }
+    assert set(row) == {"run", "seed", *RESULT_COLUMNS} - steady_state_columns
+    assert row["throughput_meters"] > 0
+
+
+def test_run_sweep_run_cached(tmp_path: Path) -> None:
+    (run,) = expand_sweep(load_sweep(_write_sweep(tmp_path, {})))
+    cache = ResultCache(tmp_path / "cache")
+
+    row = run_sweep_run(run, cache=cache)
+    assert not row["cached"]
+
+    cached_row = run_sweep_run(run, cache=cache)
+    assert cached_row["cached"]
+    assert "wall_seconds" not in cached_row
+    for column in ("throughput_meters", "total_picked_fasteners", "missed_fasteners"):
+        assert cached_row[column] == row[column]
+
+
+def test_run_sweep_run_stop_tolerance(tmp_path: Path) -> None:
+    sweep = load_sweep(_write_sweep(tmp_path, {}))
+    sweep.time = 8 * 60 * 60
+    sweep.stop_tolerance = 0.05
+    (run,) = expand_sweep(sweep)
+
+    row = run_sweep_run(run)
+    assert set(row) == {"run", *RESULT_COLUMNS}
+    assert row["converged"]
+    assert row["total_time"] < sweep.time
+    assert row["steady_state_half_width_meters"] <= (
+        0.05 * row["steady_state_throughput_meters"]
+    )